@@ -1,11 +1,17 @@
 """Zelda 1 for Gymnasium."""
 import argparse
+import json
 import sys
 import gymnasium as gym
 from nes_py.play import play_human
 from nes_py.play import play_random
 from nes_py.wrappers import JoypadSpace
+from gym_zelda_1._registration import TASK_ENV_IDS
 from gym_zelda_1.actions import MOVEMENT
+from gym_zelda_1.demonstrations import DemonstrationRecorder
+from gym_zelda_1.evaluation import evaluate
+from gym_zelda_1.evaluation import load_policy
+from gym_zelda_1.evaluation import summarize
 
 
 _ACTION_SPACES = {
@@ -43,13 +49,13 @@ def _parser():
     parser.add_argument('--env', '-e',
         type=str,
         default='Zelda1-v0',
-        choices=['Zelda1-v0'],
+        choices=['Zelda1-v0', *TASK_ENV_IDS],
         help='The environment to play'
     )
     parser.add_argument('--mode', '-m',
         type=str,
         default='human',
-        choices=['human', 'random'],
+        choices=['human', 'random', 'evaluate'],
         help='The execution mode for the environment.'
     )
     parser.add_argument('--render',
@@ -60,7 +66,23 @@ def _parser():
     parser.add_argument('--steps', '-s',
         type=int,
         default=500,
-        help='The number of random steps to take.',
+        help='The number of random steps to take, or the step limit of '
+             'each evaluated episode.',
+    )
+    parser.add_argument('--policy',
+        type=str,
+        default=None,
+        help='The "module:callable" policy to evaluate on batched observations.',
+    )
+    parser.add_argument('--episodes',
+        type=int,
+        default=10,
+        help='The number of episodes to evaluate.',
+    )
+    parser.add_argument('--num-envs', '-n',
+        type=int,
+        default=4,
+        help='The number of environment processes to evaluate with.',
     )
     parser.add_argument('--seed',
         type=int,
@@ -73,6 +95,16 @@ def _parser():
         choices=sorted(_ACTION_SPACES.keys()),
         help='The action space preset to use.',
     )
+    parser.add_argument('--record',
+        type=str,
+        default=None,
+        help='Record the actions to a demonstration file at this path.',
+    )
+    parser.add_argument('--checkpoint-interval',
+        type=int,
+        default=600,
+        help='The number of steps between RAM checkpoints in recordings.',
+    )
     parser.add_argument('--no-progress',
         action='store_false',
         dest='progress',
@@ -88,8 +120,15 @@ def _get_args(argv=None):
     args = parser.parse_args(argv)
     if args.mode == 'human' and not args.render:
         parser.error('human mode requires graphical rendering')
-    if args.mode == 'random' and args.steps <= 0:
-        parser.error('--steps must be positive in random mode')
+    if args.mode in ('random', 'evaluate') and args.steps <= 0:
+        parser.error(f'--steps must be positive in {args.mode} mode')
+    if args.mode == 'evaluate':
+        if args.policy is None:
+            parser.error('evaluate mode requires --policy')
+        if args.episodes <= 0 or args.num_envs <= 0:
+            parser.error('--episodes and --num-envs must be positive')
+    if args.checkpoint_interval <= 0:
+        parser.error('--checkpoint-interval must be positive')
     return args
 
 
@@ -112,26 +151,61 @@ def _make_env(args):
     """Build and wrap the environment requested by CLI arguments."""
     render_mode = 'human' if args.mode == 'random' and args.render else None
     env = gym.make(args.env, render_mode=render_mode)
+    if args.record is not None:
+        # record below the action space so that actions are controller bytes
+        env = DemonstrationRecorder(env, args.record, args.checkpoint_interval)
     env = _apply_action_space(env, args.actionspace)
     return _apply_first_reset_seed(env, args.seed)
 
 
+def _evaluate(args):
+    """Evaluate a policy and print its episode statistics as JSON."""
+    policy = load_policy(args.policy)
+
+    def make_env():
+        """Build one step-limited evaluation environment."""
+        env = gym.make(args.env, max_episode_steps=args.steps)
+        return _apply_action_space(env, args.actionspace)
+
+    results = evaluate(
+        policy,
+        [make_env] * args.num_envs,
+        args.episodes,
+        seed=args.seed,
+    )
+    print(json.dumps(dict(summary=summarize(results), episodes=results)))
+
+
+def _close_recording(env):
+    """Flush and close the demonstration file of a wrapped environment."""
+    while isinstance(env, gym.Wrapper):
+        if isinstance(env, DemonstrationRecorder):
+            env.writer.close()
+        env = env.env
+
+
 def main(argv=None):
     """The main entry point for the command line interface."""
     # parse arguments from the command line (argparse validates arguments)
     args = _get_args(argv)
+    if args.mode == 'evaluate':
+        _evaluate(args)
+        return 0
     # build the environment with the given ID
     env = _make_env(args)
     # play the environment with the given mode
-    if args.mode == 'human':
-        play_human(env)
-    else:
-        play_random(
-            env,
-            args.steps,
-            render=args.render,
-            progress=args.progress,
-        )
+    try:
+        if args.mode == 'human':
+            play_human(env)
+        else:
+            play_random(
+                env,
+                args.steps,
+                render=args.render,
+                progress=args.progress,
+            )
+    finally:
+        _close_recording(env)
     return 0
 
 
@@ -0,0 +1,57 @@
+"""Convert recorded Zelda 1 demonstrations into datasets."""
+import argparse
+import sys
+from gym_zelda_1.demonstrations import convert_demonstrations
+from gym_zelda_1.zelda_env import OBS_TYPES
+
+
+def _get_args(argv=None):
+    """Parse command line arguments and return them."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('paths',
+        type=str,
+        nargs='+',
+        help='The demonstration files to convert.',
+    )
+    parser.add_argument('--output', '-o',
+        type=str,
+        required=True,
+        help='The directory to write one dataset per demonstration to.',
+    )
+    parser.add_argument('--obs-type',
+        type=str,
+        default='rgb',
+        choices=OBS_TYPES,
+        help='The observation type to replay the demonstrations with.',
+    )
+    parser.add_argument('--processes', '-j',
+        type=int,
+        default=None,
+        help='The number of worker processes (defaults to the CPU count).',
+    )
+    args = parser.parse_args(argv)
+    if args.processes is not None and args.processes <= 0:
+        parser.error('--processes must be positive')
+    return args
+
+
+def main(argv=None):
+    """The main entry point for the demonstration converter."""
+    args = _get_args(argv)
+    sizes = convert_demonstrations(
+        args.paths,
+        args.output,
+        obs_type=args.obs_type,
+        processes=args.processes,
+    )
+    for path, size in zip(args.paths, sizes):
+        print(f'{path}: {size} steps')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
+
+
+# explicitly define the outward facing API of this module
+__all__ = [main.__name__]
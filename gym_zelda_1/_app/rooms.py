@@ -0,0 +1,311 @@
+"""Generate the packaged room graph from the ROM and the overworld map."""
+import argparse
+import os
+import struct
+import sys
+import zlib
+import numpy as np
+from gym_zelda_1.navigation import BOMBABLE
+from gym_zelda_1.navigation import EXITS
+from gym_zelda_1.navigation import LOCKED
+from gym_zelda_1.navigation import NEIGHBORS
+from gym_zelda_1.navigation import NUM_LEVELS
+from gym_zelda_1.navigation import NUM_ROOMS
+from gym_zelda_1.navigation import OPEN
+from gym_zelda_1.navigation import ROOM_GRAPH_PATH
+from gym_zelda_1.navigation import ROOM_GRID_SHAPE
+from gym_zelda_1.navigation import WALL
+from gym_zelda_1.navigation import RoomGraph
+from gym_zelda_1.zelda_env import MODULE_DIR
+from gym_zelda_1.zelda_env import ROM_PATH
+
+
+# the path to the map of the overworld screens (16x8 playfields)
+OVERWORLD_PATH = os.path.join(MODULE_DIR, 'img', 'overworld.png')
+
+
+# the size of the iNES header before the PRG ROM
+_HEADER_SIZE = 0x10
+
+
+# the PRG offset and size of the level info block of each level (0-9)
+_LEVEL_INFO = 0x19300
+_LEVEL_INFO_SIZE = 0xFC
+
+
+# the offsets in a level info block of the start room, the level block of
+# the rooms, and the 0xFF terminated list of cellar rooms
+_START_ROOM = 0x2F
+_LEVEL_BLOCK = 0x32
+_CELLARS = slice(0x34, 0x3E)
+
+
+# the PRG offset of the room attribute tables of each first quest level
+# block (levels 1-6 share block 6 and levels 7-9 share block 7)
+_LEVEL_BLOCKS = {6: 0x18700, 7: 0x18A00}
+
+
+# the edge type of each door type of the room attribute tables: open,
+# wall, two walk-through walls, bombable, two locked doors, and shutter
+_DOOR_EDGES = np.array(
+    [OPEN, WALL, OPEN, OPEN, BOMBABLE, LOCKED, LOCKED, OPEN], dtype=np.uint8)
+
+
+# the edge length in pixels of a block of the overworld map
+_BLOCK_SIZE = 16
+
+
+# the shape of the playfield of an overworld screen in blocks
+_SCREEN_SHAPE = (11, 16)
+
+
+# the RGB colors of walkable ground (tan and gray), of water, and of rocks
+# and trees on the overworld map
+_GROUND_COLORS = (0xFCD8A8, 0x747474)
+_WATER_COLOR = 0x2038EC
+_TERRAIN_COLORS = (0xC84C0C, 0x00A800, _WATER_COLOR)
+
+
+# the RGB color of the planks of bridges on the overworld map
+_BRIDGE_COLOR = 0xC84C0C
+
+
+# The pixel thresholds below were read off the histogram of the block
+# compositions of the map (a block is 256 pixels) and each sits in a gap
+# of it. Ground blocks, dotted sand included, have 239 or more ground
+# pixels where blocks mixing ground with rocks, trees, or water have 182
+# or fewer. Bridges are 202 pixels of planks where rocks of the same brown
+# are 150 or fewer. Stairs are 144 pixels of water colored rungs where the
+# other water blocks without gaps are 128 or fewer. Enemies drawn over bare
+# ground have fewer than 4 terrain pixels, and any ground threshold for
+# them from 1 to 62 generates the same edges.
+
+# the ground pixels of a block of (dotted) ground
+_GROUND_PIXELS = 200
+
+
+# the ground pixels of a block of an enemy drawn over bare ground and the
+# terrain pixels it may have
+_SPRITE_GROUND_PIXELS = 48
+_SPRITE_TERRAIN_PIXELS = 4
+
+
+# the plank pixels of a block of a bridge
+_BRIDGE_PIXELS = 160
+
+
+# the water pixels of a block of stairs
+_STAIR_PIXELS = 136
+
+
+def _read_png(path):
+    """
+    Read an 8-bit or 4-bit palette PNG image.
+
+    Only the None, Sub, and Up scanline filters are supported; the Average
+    and Paeth filters are sequential along each row and the overworld map
+    uses neither (every scanline of it is unfiltered).
+
+    Args:
+        path: the path of the PNG to read
+
+    Returns:
+        an int array of 0xRRGGBB colors with shape (height, width)
+
+    """
+    with open(path, 'rb') as png:
+        data = png.read()
+    offset, chunks, palette = 8, [], None
+    while offset < len(data):
+        length, kind = struct.unpack_from('>I4s', data, offset)
+        chunk = data[offset + 8:offset + 8 + length]
+        if kind == b'IHDR':
+            width, height, depth, color = struct.unpack_from('>IIBB', chunk)
+        elif kind == b'PLTE':
+            palette = np.frombuffer(chunk, np.uint8).reshape(-1, 3)
+        elif kind == b'IDAT':
+            chunks.append(chunk)
+        offset += 12 + length
+    if color != 3 or depth not in (4, 8):
+        raise ValueError(f'{path} is not a 4-bit or 8-bit palette PNG')
+    stride = (width * depth + 7) // 8
+    raw = np.frombuffer(zlib.decompress(b''.join(chunks)), np.uint8)
+    raw = raw.reshape(height, stride + 1)
+    kinds, lines = raw[:, 0], raw[:, 1:]
+    if not np.isin(kinds, (0, 1, 2)).all():
+        raise ValueError(f'{path} uses an unsupported scanline filter')
+    rows = np.zeros((height + 1, stride), dtype=np.uint8)
+    # undo the None, Sub, and Up filters of each scanline. Sub adds the
+    # byte to the left (a running sum with one byte per pixel), Up adds
+    # the byte above
+    for y in range(height):
+        line = lines[y]
+        if kinds[y] == 1:
+            line = np.cumsum(line, dtype=np.uint8)
+        elif kinds[y] == 2:
+            line = line + rows[y]
+        rows[y + 1] = line
+    indices = rows[1:]
+    if depth == 4:
+        indices = np.stack([indices >> 4, indices & 0xF], -1)
+        indices = indices.reshape(height, -1)[:, :width]
+    colors = palette.astype(np.int64) @ np.array([0x10000, 0x100, 1])
+    return colors[indices]
+
+
+def overworld_edges(path=OVERWORLD_PATH):
+    """
+    Return the edges of the overworld screens from the overworld map.
+
+    Args:
+        path: the path of the map of the overworld screens
+
+    Returns:
+        a uint8 array with shape (NUM_ROOMS, len(EXITS)) where exits are
+        OPEN if a walkable block on the edge of a screen meets a walkable
+        block on the edge of the neighboring screen (crossings that need
+        the raft or the ladder are walls)
+
+    """
+    image = _read_png(path)
+    rows, columns = _SCREEN_SHAPE
+    shape = (ROOM_GRID_SHAPE[0] * rows, _BLOCK_SIZE)
+    shape += (ROOM_GRID_SHAPE[1] * columns, _BLOCK_SIZE)
+    blocks = image.reshape(shape).transpose(0, 2, 1, 3)
+    ground = np.isin(blocks, _GROUND_COLORS).sum(axis=(2, 3))
+    terrain = np.isin(blocks, _TERRAIN_COLORS).sum(axis=(2, 3))
+    planks = (blocks == _BRIDGE_COLOR).sum(axis=(2, 3))
+    # stairs are drawn as rungs of water color with a gap every fourth row
+    # and two columns of margin, which shores and rivers never have
+    water = blocks == _WATER_COLOR
+    gaps = water[:, :, ::4].any(axis=(2, 3))
+    gaps |= water[:, :, :, :2].any(axis=(2, 3))
+    gaps |= water[:, :, :, -2:].any(axis=(2, 3))
+    stairs = (water.sum(axis=(2, 3)) >= _STAIR_PIXELS) & ~gaps
+    # blocks of (dotted) ground, of enemies drawn over bare ground, of
+    # bridges (rocks have far fewer planks per block), and of stairs
+    walkable = ground >= _GROUND_PIXELS
+    walkable |= (ground >= _SPRITE_GROUND_PIXELS) & (
+        terrain < _SPRITE_TERRAIN_PIXELS)
+    walkable |= (planks >= _BRIDGE_PIXELS) | stairs
+    walkable = walkable.reshape(ROOM_GRID_SHAPE[0], rows, -1, columns)
+    screens = walkable.transpose(0, 2, 1, 3).reshape(NUM_ROOMS, rows, -1)
+    # the blocks of each screen edge in EXITS order
+    sides = [
+        screens[:, 0, :],
+        screens[:, -1, :],
+        screens[:, :, -1],
+        screens[:, :, 0],
+    ]
+    edges = np.full((NUM_ROOMS, len(EXITS)), WALL, dtype=np.uint8)
+    for exit_, side in enumerate(sides):
+        rooms = np.flatnonzero(NEIGHBORS[:, exit_] >= 0)
+        # the far side of N is S of the neighbor, E is W (and vice versa)
+        far_side = sides[exit_ ^ 1][NEIGHBORS[rooms, exit_]]
+        crossing = (side[rooms] & far_side).any(axis=1)
+        edges[rooms[crossing], exit_] = OPEN
+    return edges
+
+
+def _level_rooms(doors, start, seeds):
+    """
+    Return the rooms of a level by flooding its doors from its start room.
+
+    Args:
+        doors: the (NUM_ROOMS, len(EXITS)) door edges of the level block
+        start: the start room of the level
+        seeds: the rooms that the stairways of the level's cellars lead to
+
+    Returns:
+        a sorted list of the rooms of the level
+
+    """
+    rooms = set()
+    frontier = [start, *seeds]
+    while frontier:
+        room = frontier.pop()
+        if room in rooms:
+            continue
+        rooms.add(room)
+        for exit_, neighbor in enumerate(NEIGHBORS[room]):
+            if neighbor >= 0 and doors[room, exit_] != WALL:
+                frontier.append(int(neighbor))
+    return sorted(rooms)
+
+
+def underworld_edges(path=ROM_PATH):
+    """
+    Return the edges of the first quest dungeons from the ROM's room data.
+
+    Args:
+        path: the path of the Zelda 1 ROM
+
+    Returns:
+        a uint8 array with shape (NUM_LEVELS - 1, NUM_ROOMS, len(EXITS))
+        of the door edges of the rooms of each dungeon (rooms of the other
+        dungeons in the same level block are walls)
+
+    """
+    prg = np.fromfile(path, dtype=np.uint8)[_HEADER_SIZE:]
+    edges = np.zeros((NUM_LEVELS - 1, NUM_ROOMS, len(EXITS)), np.uint8)
+    for level in range(1, NUM_LEVELS):
+        info = _LEVEL_INFO + level * _LEVEL_INFO_SIZE
+        info = prg[info:info + _LEVEL_INFO_SIZE]
+        table = _LEVEL_BLOCKS[int(info[_LEVEL_BLOCK])]
+        # the first two room attribute tables hold the door types in bits
+        # 7-5 and 4-2 (N and S in the first, W and E in the second)
+        first = prg[table:table + NUM_ROOMS]
+        second = prg[table + NUM_ROOMS:table + 2 * NUM_ROOMS]
+        types = np.stack([first >> 5, first >> 2 & 7, second >> 2 & 7,
+            second >> 5], axis=1)
+        doors = _DOOR_EDGES[types]
+        doors[NEIGHBORS < 0] = WALL
+        # cellars hold the rooms of both of their stairways in the tables
+        seeds = []
+        for cellar in info[_CELLARS].tolist():
+            if cellar == 0xFF:
+                break
+            seeds += [int(first[cellar]), int(second[cellar])]
+        rooms = _level_rooms(doors, int(info[_START_ROOM]), seeds)
+        edges[level - 1, rooms] = doors[rooms]
+    return edges
+
+
+def _get_args(argv=None):
+    """Parse command line arguments and return them."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rom',
+        type=str,
+        default=ROM_PATH,
+        help='The Zelda 1 ROM to read the dungeon rooms from.',
+    )
+    parser.add_argument('--overworld',
+        type=str,
+        default=OVERWORLD_PATH,
+        help='The map of the overworld screens.',
+    )
+    parser.add_argument('--output', '-o',
+        type=str,
+        default=ROOM_GRAPH_PATH,
+        help='The .npz file to write the room graph to.',
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """The main entry point for the room graph generator."""
+    args = _get_args(argv)
+    edges = np.zeros((NUM_LEVELS, NUM_ROOMS, len(EXITS)), dtype=np.uint8)
+    edges[0] = overworld_edges(args.overworld)
+    edges[1:] = underworld_edges(args.rom)
+    RoomGraph(edges).save(args.output)
+    print(f'wrote {np.count_nonzero(edges)} edges to {args.output}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
+
+
+# explicitly define the outward facing API of this module
+__all__ = [main.__name__]
@@ -0,0 +1,81 @@
+"""Host a pool of Zelda 1 environments for remote actors."""
+import argparse
+import asyncio
+import sys
+import gymnasium as gym
+from gym_zelda_1._app.cli import _ACTION_SPACES
+from gym_zelda_1._app.cli import _apply_action_space
+from gym_zelda_1.remote import EnvServer
+
+
+def _get_args(argv=None):
+    """Parse command line arguments and return them."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--env', '-e',
+        type=str,
+        default='Zelda1-v0',
+        choices=['Zelda1-v0'],
+        help='The environment to host.'
+    )
+    parser.add_argument('--num-envs', '-n',
+        type=int,
+        default=1,
+        help='The number of environments in the pool.',
+    )
+    parser.add_argument('--host',
+        type=str,
+        default='127.0.0.1',
+        help='The host to listen on.',
+    )
+    parser.add_argument('--port', '-p',
+        type=int,
+        default=5555,
+        help='The TCP port to listen on.',
+    )
+    parser.add_argument('--unix',
+        type=str,
+        default=None,
+        help='Listen on a Unix domain socket at this path instead of TCP.',
+    )
+    parser.add_argument('--actionspace', '--action-space',
+        type=str,
+        default='full',
+        choices=sorted(_ACTION_SPACES.keys()),
+        help='The action space preset to use.',
+    )
+    args = parser.parse_args(argv)
+    if args.num_envs <= 0:
+        parser.error('--num-envs must be positive')
+    return args
+
+
+async def _serve(args):
+    """Build the environment pool and serve it until interrupted."""
+    server = EnvServer(
+        lambda: _apply_action_space(gym.make(args.env), args.actionspace),
+        args.num_envs,
+    )
+    await server.start(host=args.host, port=args.port, path=args.unix)
+    print(f'serving {args.num_envs} x {args.env} on {server.address}')
+    try:
+        await server.serve_forever()
+    finally:
+        await server.close()
+
+
+def main(argv=None):
+    """The main entry point for the environment server."""
+    args = _get_args(argv)
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
+
+
+# explicitly define the outward facing API of this module
+__all__ = [main.__name__]
@@ -12,6 +12,29 @@ _gym.envs.registration.register(
 )
 
 
+# the registered task environments and the task that each one solves
+TASK_ENV_IDS = {
+    'Zelda1GetSword-v0': 'get_sword',
+    'Zelda1Rupees-v0': 'rupees',
+    'Zelda1ReachRoom-v0': 'reach_room',
+    'Zelda1ClearRoom-v0': 'clear_room',
+}
+
+
+# the number of steps before a task episode is truncated
+TASK_MAX_EPISODE_STEPS = 5000
+
+
+for _env_id, _task in TASK_ENV_IDS.items():
+    _gym.envs.registration.register(
+        id=_env_id,
+        entry_point='gym_zelda_1:Zelda1Env',
+        kwargs=dict(task=_task),
+        max_episode_steps=TASK_MAX_EPISODE_STEPS,
+        nondeterministic=True,
+    )
+
+
 __all__ = [
     'make',
 ]
@@ -0,0 +1,29 @@
+"""Helpers for storing and sending the observations of Gymnasium spaces."""
+from gymnasium import spaces
+import numpy as np
+
+
+def observation_dtype(observation_space):
+    """
+    Return the shape and dtype to store observations of a space with.
+
+    Args:
+        observation_space: a Box space or a Dict space of Box spaces
+
+    Returns:
+        a tuple of (shape, dtype). Dict observations are stored as a
+        structured dtype with one field per key
+
+    """
+    if isinstance(observation_space, spaces.Box):
+        return observation_space.shape, observation_space.dtype
+    if isinstance(observation_space, spaces.Dict):
+        return (), np.dtype([
+            (key, space.dtype, space.shape)
+            for key, space in observation_space.spaces.items()
+        ])
+    raise ValueError('observation_space must be a Box or Dict of Boxes')
+
+
+# explicitly define the outward facing API of this module
+__all__ = [observation_dtype.__name__]
@@ -0,0 +1,322 @@
+"""A Go-Explore style archive of downscaled Zelda 1 state cells."""
+import numpy as np
+from .zelda_env import INFO_RECORD_DTYPE
+
+
+# the info record fields whose non-zero values are packed as item bits
+ITEM_FIELDS = (
+    'has_bow',
+    'candle_type',
+    'has_whistle',
+    'has_food',
+    'potion_type',
+    'has_magic_rod',
+    'has_raft',
+    'has_magic_book',
+    'ring_type',
+    'has_step_ladder',
+    'has_magic_key',
+    'has_power_bracelet',
+    'has_letter',
+    'has_boomerang',
+    'has_magic_boomerang',
+    'has_magic_shield',
+)
+
+
+# the column of each item field in a raw (records, fields) byte matrix
+_ITEM_COLUMNS = [INFO_RECORD_DTYPE.names.index(name) for name in ITEM_FIELDS]
+
+
+def cell_keys(records, cell_size=16):
+    """
+    Return the cell key of each of a batch of info records.
+
+    Args:
+        records: an array of INFO_RECORD_DTYPE
+        cell_size: the size in pixels of the cells that positions snap to
+
+    Returns:
+        a uint64 array of keys that pack (from the high bits down) the
+        level, room, quantized x and y, keys, sword, and 16 item bits
+
+    """
+    records = np.ascontiguousarray(records).reshape(-1)
+    raw = records.view(np.uint8).reshape(len(records), -1)
+    items = np.packbits(raw[:, _ITEM_COLUMNS] != 0, axis=1, bitorder='little')
+    items = np.ascontiguousarray(items).view('<u2')[:, 0]
+    fields = [
+        (records['current_level'], 8),
+        (records['room'], 8),
+        (records['x_pos'] // cell_size, 8),
+        (records['y_pos'] // cell_size, 8),
+        (records['keys'], 8),
+        (records['sword'], 4),
+        (items, 16),
+    ]
+    keys = np.zeros(len(records), dtype=np.uint64)
+    for values, bits in fields:
+        keys <<= np.uint64(bits)
+        keys |= values.astype(np.uint64) & np.uint64((1 << bits) - 1)
+    return keys
+
+
+class CellArchive:
+    """An archive that maps state cells to their best known trajectory."""
+
+    def __init__(self, cell_size=16, capacity=1024):
+        """
+        Initialize a new empty archive.
+
+        Args:
+            cell_size: the size in pixels of the cells that positions snap to
+            capacity: the initial number of cells to allocate space for
+
+        Returns:
+            None
+
+        """
+        self.cell_size = cell_size
+        self._size = 0
+        # the sorted keys of the cells and the row of each sorted key
+        self._sorted_keys = np.empty(0, dtype=np.uint64)
+        self._sorted_rows = np.empty(0, dtype=np.int64)
+        # the per-row cell data, grown by doubling
+        self.keys = np.empty(capacity, dtype=np.uint64)
+        self.scores = np.empty(capacity, dtype=np.float64)
+        self.lengths = np.empty(capacity, dtype=np.int64)
+        self.segments = np.empty(capacity, dtype=np.int64)
+        self.visits = np.empty(capacity, dtype=np.int64)
+        self.chosen = np.empty(capacity, dtype=np.int64)
+        # the in-memory emulator snapshot of each cell (None if the cell was
+        # reached without an environment to snapshot)
+        self.states = np.empty(capacity, dtype=object)
+        # trajectories are immutable segments of actions that continue from
+        # a prefix of a parent segment, so cells that share a history share
+        # its storage and replacing a cell never invalidates another. Unlike
+        # the snapshots, they can be written to disk
+        self._segment_parents = []
+        self._segment_actions = []
+
+    def __len__(self):
+        """Return the number of cells in the archive."""
+        return self._size
+
+    def _grow(self, size):
+        """Grow the per-row arrays to hold at least size cells."""
+        capacity = len(self.keys)
+        if size <= capacity:
+            return
+        while capacity < size:
+            capacity *= 2
+        names = ('keys', 'scores', 'lengths', 'segments', 'visits', 'chosen',
+            'states')
+        for name in names:
+            array = getattr(self, name)
+            grown = np.empty(capacity, dtype=array.dtype)
+            grown[:len(array)] = array
+            setattr(self, name, grown)
+
+    def start(self, row=None):
+        """
+        Start a new trajectory segment.
+
+        Args:
+            row: the cell whose trajectory the segment continues from, or
+                None to start from the environment's start state
+
+        Returns:
+            the ID of the new segment
+
+        """
+        if row is None:
+            parent = (-1, 0)
+        else:
+            parent = (int(self.segments[row]), int(self.lengths[row]))
+        self._segment_parents.append(parent)
+        self._segment_actions.append(bytearray())
+        return len(self._segment_actions) - 1
+
+    def append(self, segments, actions):
+        """
+        Append one action to each of a batch of segments.
+
+        Args:
+            segments: the segment IDs of a batch of explorers
+            actions: the uint8 action that each explorer took
+
+        Returns:
+            None
+
+        """
+        for segment, action in zip(segments, actions):
+            self._segment_actions[segment].append(action)
+
+    def _length(self, segment):
+        """Return the number of actions from the start state to a segment."""
+        _, prefix = self._segment_parents[segment]
+        return prefix + len(self._segment_actions[segment])
+
+    def update(self, segments, records, scores, envs=None):
+        """
+        Add or improve the cells reached by a batch of explorers.
+
+        Args:
+            segments: the segment ID of each explorer
+            records: the INFO_RECORD_DTYPE record of each explorer's state
+            scores: the score of each explorer's trajectory (higher is better)
+            envs: an optional environment of each explorer. The cells that
+                an explorer adds or improves keep a dump_state snapshot of it
+
+        Returns:
+            a bool array of which explorers added or improved a cell
+
+        """
+        segments = np.asarray(segments, dtype=np.int64)
+        scores = np.asarray(scores, dtype=np.float64)
+        keys = cell_keys(records, self.cell_size)
+        lengths = np.array([self._length(s) for s in segments], dtype=np.int64)
+        # pick the best candidate of each key: highest score, then shortest
+        order = np.lexsort((lengths, -scores, keys))
+        unique, first, counts = np.unique(
+            keys[order], return_index=True, return_counts=True)
+        best = order[first]
+        # find the rows of the keys that are already in the archive
+        position = np.searchsorted(self._sorted_keys, unique)
+        clipped = np.minimum(position, max(self._size - 1, 0))
+        found = np.zeros(len(unique), dtype=bool)
+        rows = np.full(len(unique), -1, dtype=np.int64)
+        if self._size:
+            found = self._sorted_keys[clipped] == unique
+            rows = np.where(found, self._sorted_rows[clipped], -1)
+        # existing cells count visits and take better trajectories
+        existing = rows[found]
+        self.visits[existing] += counts[found]
+        candidates = best[found]
+        better = scores[candidates] > self.scores[existing]
+        better |= (scores[candidates] == self.scores[existing]) & (
+            lengths[candidates] < self.lengths[existing])
+        improved = np.zeros(len(segments), dtype=bool)
+        improved[candidates[better]] = True
+        self._set(existing[better], candidates[better], segments, scores, lengths,
+            envs)
+        # new cells are appended as rows and merged into the sorted keys
+        new = ~found
+        if new.any():
+            start = self._size
+            new_rows = np.arange(start, start + new.sum())
+            self._grow(start + len(new_rows))
+            self._size += len(new_rows)
+            self.keys[new_rows] = unique[new]
+            self.visits[new_rows] = counts[new]
+            self.chosen[new_rows] = 0
+            self._set(new_rows, best[new], segments, scores, lengths, envs)
+            improved[best[new]] = True
+            self._sorted_keys = np.insert(
+                self._sorted_keys, position[new], unique[new])
+            self._sorted_rows = np.insert(
+                self._sorted_rows, position[new], new_rows)
+        return improved
+
+    def _set(self, rows, candidates, segments, scores, lengths, envs):
+        """Set the trajectory of cells to that of the given candidates."""
+        self.scores[rows] = scores[candidates]
+        self.lengths[rows] = lengths[candidates]
+        self.segments[rows] = segments[candidates]
+        for row, candidate in zip(rows.tolist(), candidates.tolist()):
+            state = None
+            if envs is not None:
+                state = envs[candidate].unwrapped.dump_state()
+            self.states[row] = state
+
+    def find(self, records):
+        """
+        Return the rows of the cells of a batch of info records.
+
+        Args:
+            records: an array of INFO_RECORD_DTYPE
+
+        Returns:
+            an int array of rows, -1 for cells that are not in the archive
+
+        """
+        keys = cell_keys(records, self.cell_size)
+        if not self._size:
+            return np.full(len(keys), -1, dtype=np.int64)
+        position = np.searchsorted(self._sorted_keys, keys)
+        position = np.minimum(position, self._size - 1)
+        found = self._sorted_keys[position] == keys
+        return np.where(found, self._sorted_rows[position], -1)
+
+    def select(self, count, rng=None):
+        """
+        Sample cells to return to, favoring rarely chosen and visited cells.
+
+        Args:
+            count: the number of cells to select
+            rng: an optional NumPy random generator
+
+        Returns:
+            an int array of count rows
+
+        """
+        if not self._size:
+            raise ValueError('the archive is empty')
+        rng = np.random.default_rng() if rng is None else rng
+        size = self._size
+        weights = 1 / np.sqrt(self.chosen[:size] + 1)
+        weights += 1 / np.sqrt(self.visits[:size] + 1)
+        rows = rng.choice(size, size=count, p=weights / weights.sum())
+        np.add.at(self.chosen, rows, 1)
+        return rows
+
+    def trajectory(self, row):
+        """
+        Return the actions that reach a cell from the start state.
+
+        Args:
+            row: the row of the cell
+
+        Returns:
+            a uint8 array of actions
+
+        """
+        parts = []
+        segment, length = int(self.segments[row]), int(self.lengths[row])
+        while segment >= 0:
+            parent, prefix = self._segment_parents[segment]
+            parts.append(self._segment_actions[segment][:length - prefix])
+            segment, length = parent, prefix
+        return np.frombuffer(b''.join(reversed(parts)), dtype=np.uint8)
+
+    def restore(self, env, row):
+        """
+        Return an environment to a cell.
+
+        Cells with a snapshot load it into the environment. Other cells
+        replay their trajectory, which needs an environment that was reset
+        to the start state.
+
+        Args:
+            env: the environment to return to the cell
+            row: the row of the cell to return to
+
+        Returns:
+            the last transition of the replay, or None if the snapshot was
+            loaded or the trajectory is empty
+
+        """
+        if self.states[row] is not None:
+            env.unwrapped.load_state(self.states[row])
+            return None
+        transition = None
+        for action in self.trajectory(row).tolist():
+            transition = env.step(action)
+        return transition
+
+
+# explicitly define the outward facing API of this module
+__all__ = [
+    CellArchive.__name__,
+    cell_keys.__name__,
+]
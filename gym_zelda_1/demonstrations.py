@@ -0,0 +1,367 @@
+"""Compact streaming recordings of human demonstrations."""
+import json
+import multiprocessing
+import os
+import struct
+import gymnasium as gym
+import numpy as np
+from .zelda_env import Zelda1Env
+
+
+# the magic bytes at the start of a demonstration file
+MAGIC = b'ZDEMO1'
+
+
+# the kinds of records in a demonstration file
+_RESET = 0
+_ACTIONS = 1
+_CHECKPOINT = 2
+
+
+# the header of a record (kind) and the payloads of each kind of record:
+# a reset holds the seed (-1 for none) and the length of the JSON keyword
+# arguments of the environment (followed by the JSON), a block of actions
+# holds its length (followed by one controller byte per step), and a
+# checkpoint holds the step of the episode (followed by the RAM)
+_KIND = struct.Struct('<B')
+_SEED = struct.Struct('<q')
+_LENGTH = struct.Struct('<I')
+_STEP = struct.Struct('<I')
+
+
+# the size of the RAM stored in each checkpoint
+_RAM_SIZE = 0x800
+
+
+# the seed written for resets without a seed
+_NO_SEED = -1
+
+
+class DemonstrationWriter:
+    """A streaming writer of actions and periodic RAM checkpoints."""
+
+    def __init__(self, path, checkpoint_interval=600):
+        """
+        Open a new demonstration file.
+
+        Args:
+            path: the path of the file to write
+            checkpoint_interval: the number of steps between RAM checkpoints
+                (and between writes of the buffered actions)
+
+        Returns:
+            None
+
+        Notes:
+            NES emulator states cannot be serialized, so a demonstration is
+            the seed and actions of each episode, which replay exactly. The
+            RAM checkpoints let readers verify that a replay is in sync
+
+        """
+        if checkpoint_interval <= 0:
+            raise ValueError('checkpoint_interval must be positive')
+        self.checkpoint_interval = checkpoint_interval
+        self._file = open(path, 'wb')
+        self._file.write(MAGIC)
+        self._actions = bytearray()
+        self._step = 0
+
+    def _flush_actions(self):
+        """Write the buffered actions as one block."""
+        if self._actions:
+            self._file.write(_KIND.pack(_ACTIONS))
+            self._file.write(_LENGTH.pack(len(self._actions)))
+            self._file.write(self._actions)
+            self._actions.clear()
+
+    def _write_checkpoint(self, ram):
+        """Write the RAM at the current step of the episode."""
+        self._file.write(_KIND.pack(_CHECKPOINT))
+        self._file.write(_STEP.pack(self._step))
+        self._file.write(ram.tobytes())
+
+    def reset(self, seed=None, env_kwargs=None, ram=None):
+        """
+        Begin a new episode.
+
+        Args:
+            seed: the seed that the environment was reset with
+            env_kwargs: the JSON serializable keyword arguments of Zelda1Env
+                that change the episodes (e.g., the task and its parameters)
+            ram: the optional RAM after the reset, checkpointed as step 0 so
+                that replays from the wrong start state are detected
+
+        Returns:
+            None
+
+        """
+        self._flush_actions()
+        kwargs = json.dumps(env_kwargs or {}, sort_keys=True).encode()
+        self._file.write(_KIND.pack(_RESET))
+        self._file.write(_SEED.pack(_NO_SEED if seed is None else seed))
+        self._file.write(_LENGTH.pack(len(kwargs)))
+        self._file.write(kwargs)
+        self._step = 0
+        if ram is not None:
+            self._write_checkpoint(ram)
+
+    def step(self, action, ram):
+        """
+        Record the controller byte of a step.
+
+        Args:
+            action: the controller byte that was pressed
+            ram: the RAM after the step (checkpointed periodically)
+
+        Returns:
+            None
+
+        """
+        self._actions.append(action)
+        self._step += 1
+        if self._step % self.checkpoint_interval == 0:
+            self._flush_actions()
+            self._write_checkpoint(ram)
+
+    def close(self):
+        """Write the buffered actions and close the file."""
+        if not self._file.closed:
+            self._flush_actions()
+            self._file.close()
+
+
+class DemonstrationRecorder(gym.Wrapper):
+    """A wrapper that records the controller bytes sent to Zelda1Env."""
+
+    def __init__(self, env, path, checkpoint_interval=600):
+        """
+        Initialize a new recorder.
+
+        Args:
+            env: the environment to record (before any action wrappers, so
+                that actions are raw controller bytes)
+            path: the path of the demonstration file to write
+            checkpoint_interval: the number of steps between RAM checkpoints
+
+        Returns:
+            None
+
+        """
+        super().__init__(env)
+        self.writer = DemonstrationWriter(path, checkpoint_interval)
+
+    def reset(self, *, seed=None, options=None):
+        """Reset the environment and begin a new recorded episode."""
+        if options:
+            raise ValueError('demonstrations do not record reset options')
+        result = self.env.reset(seed=seed, options=options)
+        unwrapped = self.env.unwrapped
+        self.writer.reset(seed, unwrapped.episode_kwargs(), unwrapped.ram)
+        return result
+
+    def step(self, action):
+        """Step the environment and record the action."""
+        result = self.env.step(action)
+        self.writer.step(action, self.env.unwrapped.ram)
+        return result
+
+    def get_keys_to_action(self):
+        """Return the keyboard mapping for the wrapped environment."""
+        return self.env.unwrapped.get_keys_to_action()
+
+    def close(self):
+        """Close the demonstration file and the environment."""
+        self.writer.close()
+        super().close()
+
+
+def read_demonstration(path):
+    """
+    Read the episodes of a demonstration file.
+
+    Args:
+        path: the path of the demonstration file to read
+
+    Returns:
+        a list with a dictionary per episode of the seed (None if the reset
+        was unseeded), the keyword arguments of the environment, the uint8
+        actions, and a dictionary that maps steps to their RAM checkpoints
+
+    """
+    with open(path, 'rb') as demonstration:
+        data = demonstration.read()
+    if not data.startswith(MAGIC):
+        raise ValueError(f'{path} is not a demonstration file')
+    episodes = []
+    blocks = []
+    offset = len(MAGIC)
+    while offset < len(data):
+        kind, = _KIND.unpack_from(data, offset)
+        offset += _KIND.size
+        if kind == _RESET:
+            seed, = _SEED.unpack_from(data, offset)
+            offset += _SEED.size
+            length, = _LENGTH.unpack_from(data, offset)
+            offset += _LENGTH.size
+            env_kwargs = json.loads(data[offset:offset + length])
+            offset += length
+            blocks = []
+            episodes.append(dict(
+                seed=None if seed == _NO_SEED else seed,
+                env_kwargs=env_kwargs,
+                actions=blocks,
+                checkpoints={},
+            ))
+        elif kind == _ACTIONS:
+            length, = _LENGTH.unpack_from(data, offset)
+            offset += _LENGTH.size
+            blocks.append(data[offset:offset + length])
+            offset += length
+        elif kind == _CHECKPOINT:
+            step, = _STEP.unpack_from(data, offset)
+            offset += _STEP.size
+            ram = np.frombuffer(data, np.uint8, _RAM_SIZE, offset)
+            episodes[-1]['checkpoints'][step] = ram
+            offset += _RAM_SIZE
+        else:
+            raise ValueError(f'unknown record kind {kind} in {path}')
+    for episode in episodes:
+        actions = b''.join(episode['actions'])
+        episode['actions'] = np.frombuffer(actions, dtype=np.uint8)
+    return episodes
+
+
+def _open_observations(observation_space, directory, size):
+    """
+    Create the memory-mapped .npy files of a dataset's observations.
+
+    Args:
+        observation_space: a Box space or a Dict space of Box spaces
+        directory: the directory to create the files in
+        size: the number of observations
+
+    Returns:
+        a dictionary that maps each key of a Dict space (or None for a Box
+        space) to its writable array
+
+    """
+    if isinstance(observation_space, gym.spaces.Dict):
+        spaces = observation_space.spaces
+    else:
+        spaces = {None: observation_space}
+    observations = {}
+    for key, space in spaces.items():
+        name = 'observations' if key is None else f'observations_{key}'
+        observations[key] = np.lib.format.open_memmap(
+            os.path.join(directory, f'{name}.npy'),
+            mode='w+',
+            dtype=space.dtype,
+            shape=(size, *space.shape),
+        )
+    return observations
+
+
+def convert_demonstration(path, directory, obs_type='rgb'):
+    """
+    Replay a demonstration into an observation and action dataset.
+
+    Args:
+        path: the path of the demonstration file to convert
+        directory: the directory to write the dataset's .npy files to
+        obs_type: the observation type of the environment to replay with
+
+    Returns:
+        the number of observation and action pairs written
+
+    Notes:
+        the dataset holds one observation (before the action) per action in
+        observations.npy (or observations_<key>.npy for dict observations),
+        the actions in actions.npy, and the index of the first pair of each
+        episode in episodes.npy. episodes replay in an environment rebuilt
+        from their recorded keyword arguments (e.g., the task)
+
+    """
+    episodes = read_demonstration(path)
+    size = sum(len(episode['actions']) for episode in episodes)
+    os.makedirs(directory, exist_ok=True)
+    # one environment per distinct set of keyword arguments (e.g., task)
+    envs = {}
+
+    def make_env(env_kwargs):
+        """Return the replay environment of an episode."""
+        key = json.dumps(env_kwargs, sort_keys=True)
+        if key not in envs:
+            envs[key] = Zelda1Env(obs_type=obs_type, **env_kwargs)
+        return envs[key]
+
+    def check(env, episode, step):
+        """Raise an error if the replay left the recorded RAM."""
+        checkpoint = episode['checkpoints'].get(step)
+        if checkpoint is None or np.array_equal(checkpoint, env.ram):
+            return
+        raise ValueError(f'{path} diverged at step {step}')
+
+    try:
+        space = make_env({}).observation_space
+        observations = _open_observations(space, directory, size)
+        lengths = [len(episode['actions']) for episode in episodes]
+        actions = np.zeros(size, dtype=np.uint8)
+        if episodes:
+            actions[:] = np.concatenate([e['actions'] for e in episodes])
+        np.save(os.path.join(directory, 'actions.npy'), actions)
+        starts = np.cumsum([0] + lengths)[:-1]
+        np.save(os.path.join(directory, 'episodes.npy'), starts)
+        for start, episode in zip(starts, episodes):
+            env = make_env(episode['env_kwargs'])
+            observation, _ = env.reset(seed=episode['seed'])
+            check(env, episode, 0)
+            for step, action in enumerate(episode['actions'].tolist()):
+                for key, array in observations.items():
+                    value = observation if key is None else observation[key]
+                    array[start + step] = value
+                observation, *_ = env.step(action)
+                check(env, episode, step + 1)
+        for array in observations.values():
+            array.flush()
+    finally:
+        for env in envs.values():
+            env.close()
+    return size
+
+
+def _convert(job):
+    """Convert one demonstration file in a worker process."""
+    return convert_demonstration(*job)
+
+
+def convert_demonstrations(paths, directory, obs_type='rgb', processes=None):
+    """
+    Convert demonstration files into datasets in parallel.
+
+    Args:
+        paths: the paths of the demonstration files to convert
+        directory: the directory to write one dataset directory (named
+            after each file) to
+        obs_type: the observation type of the environment to replay with
+        processes: the number of worker processes (defaults to CPU count)
+
+    Returns:
+        a list of the number of pairs written for each file
+
+    """
+    jobs = []
+    for path in paths:
+        name = os.path.splitext(os.path.basename(path))[0]
+        jobs.append((path, os.path.join(directory, name), obs_type))
+    with multiprocessing.Pool(processes) as pool:
+        return pool.map(_convert, jobs, chunksize=1)
+
+
+# explicitly define the outward facing API of this module
+__all__ = [
+    DemonstrationRecorder.__name__,
+    DemonstrationWriter.__name__,
+    convert_demonstration.__name__,
+    convert_demonstrations.__name__,
+    read_demonstration.__name__,
+]
@@ -0,0 +1,215 @@
+"""A record and replay harness for checking emulator determinism."""
+import json
+import multiprocessing
+import zlib
+import numpy as np
+from .zelda_env import Zelda1Env
+
+
+# the divergence reported for a replay that matches its recording
+NO_DIVERGENCE = -1
+
+
+def ram_hash(ram):
+    """
+    Return a 32-bit hash of a RAM vector.
+
+    Args:
+        ram: the uint8 RAM of an environment
+
+    Returns:
+        the CRC32 of the RAM bytes
+
+    """
+    return zlib.crc32(ram)
+
+
+class Recording:
+    """An action sequence and the RAM hash after the reset and each step."""
+
+    def __init__(self, actions, hashes, seed=None, options=None,
+        env_kwargs=None,
+    ):
+        """
+        Initialize a new recording.
+
+        Args:
+            actions: a uint8 array of the controller byte of each step
+            hashes: a uint32 array of len(actions) + 1 RAM hashes, the first
+                after the reset and one after each step
+            seed: the seed that the episode was reset with
+            options: the options that the episode was reset with
+            env_kwargs: the keyword arguments of the Zelda1Env that played
+                the episode (see Zelda1Env.episode_kwargs)
+
+        Returns:
+            None
+
+        """
+        self.actions = np.asarray(actions, dtype=np.uint8)
+        self.hashes = np.asarray(hashes, dtype=np.uint32)
+        if len(self.hashes) != len(self.actions) + 1:
+            raise ValueError('expected one hash per step plus the reset')
+        self.seed = seed
+        self.options = dict(options or {})
+        self.env_kwargs = dict(env_kwargs or {})
+
+    def __len__(self):
+        """Return the number of steps in the recording."""
+        return len(self.actions)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load a recording saved with Recording.save.
+
+        Args:
+            path: the path of the .npz file to load
+
+        Returns:
+            the loaded recording
+
+        """
+        with np.load(path) as data:
+            metadata = json.loads(str(data['metadata']))
+            return cls(data['actions'], data['hashes'], **metadata)
+
+    def save(self, path):
+        """
+        Save the recording as compact arrays.
+
+        Args:
+            path: the path of the .npz file to write
+
+        Returns:
+            None
+
+        """
+        metadata = json.dumps(dict(
+            seed=self.seed,
+            options=self.options,
+            env_kwargs=self.env_kwargs,
+        ))
+        np.savez_compressed(path,
+            actions=self.actions,
+            hashes=self.hashes,
+            metadata=np.array(metadata),
+        )
+
+
+def record(actions, seed=None, options=None, env=None, env_kwargs=None):
+    """
+    Play an action sequence and record the RAM hash after each step.
+
+    Args:
+        actions: the controller byte of each step
+        seed: the seed to reset the environment with
+        options: the options to reset the environment with
+        env: an optional Zelda1Env to reuse (a new one is made otherwise)
+        env_kwargs: keyword arguments for the new Zelda1Env (e.g., the task)
+
+    Returns:
+        a Recording of the episode, with the keyword arguments that rebuild
+        its environment
+
+    """
+    actions = np.asarray(actions, dtype=np.uint8)
+    hashes = np.empty(len(actions) + 1, dtype=np.uint32)
+    owned = env is None
+    env = Zelda1Env(**(env_kwargs or {})) if owned else env
+    env_kwargs = env.unwrapped.episode_kwargs()
+    try:
+        env.reset(seed=seed, options=options)
+        hashes[0] = ram_hash(env.ram)
+        for step, action in enumerate(actions.tolist(), 1):
+            env.step(action)
+            hashes[step] = ram_hash(env.ram)
+    finally:
+        if owned:
+            env.close()
+    return Recording(actions, hashes,
+        seed=seed,
+        options=options,
+        env_kwargs=env_kwargs,
+    )
+
+
+def replay(recording, env=None):
+    """
+    Replay a recording and return the first step whose RAM diverges.
+
+    Args:
+        recording: the Recording to replay
+        env: an optional Zelda1Env to reuse (a new one is made from the
+            recording's env_kwargs otherwise)
+
+    Returns:
+        the index of the first divergent hash (0 is the reset, i is the
+        state after step i) or NO_DIVERGENCE if every hash matches
+
+    Notes:
+        RAM is hashed once per step and a step emulates one or more frames
+        (Zelda1Env skips the frames of scrolls and other boring states), so
+        a divergence is located to the step whose frames produced it
+
+    """
+    owned = env is None
+    env = Zelda1Env(**recording.env_kwargs) if owned else env
+    if env.unwrapped.episode_kwargs() != recording.env_kwargs:
+        raise ValueError('env does not match the recording\'s env_kwargs')
+    try:
+        env.reset(seed=recording.seed, options=recording.options)
+        if ram_hash(env.ram) != recording.hashes[0]:
+            return 0
+        hashes = recording.hashes.tolist()
+        for step, action in enumerate(recording.actions.tolist(), 1):
+            env.step(action)
+            # stop at the first divergence instead of replaying the rest
+            if ram_hash(env.ram) != hashes[step]:
+                return step
+    finally:
+        if owned:
+            env.close()
+    return NO_DIVERGENCE
+
+
+# the environments that each worker process reuses across replays, keyed by
+# their JSON encoded keyword arguments
+_worker_envs = {}
+
+
+def _replay_in_worker(recording):
+    """Replay a recording with an environment of a worker process."""
+    key = json.dumps(recording.env_kwargs, sort_keys=True)
+    if key not in _worker_envs:
+        _worker_envs[key] = Zelda1Env(**recording.env_kwargs)
+    return replay(recording, env=_worker_envs[key])
+
+
+def check(recordings, processes=None):
+    """
+    Replay many recordings in parallel and report their divergences.
+
+    Args:
+        recordings: an iterable of Recording objects
+        processes: the number of worker processes (defaults to CPU count)
+
+    Returns:
+        an int64 array with the first divergent step of each recording, or
+        NO_DIVERGENCE for recordings that replay exactly
+
+    """
+    recordings = list(recordings)
+    with multiprocessing.Pool(processes) as pool:
+        divergences = pool.map(_replay_in_worker, recordings, chunksize=1)
+    return np.array(divergences, dtype=np.int64)
+
+
+# explicitly define the outward facing API of this module
+__all__ = [
+    Recording.__name__,
+    check.__name__,
+    ram_hash.__name__,
+    record.__name__,
+    replay.__name__,
+]
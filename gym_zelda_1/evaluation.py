@@ -0,0 +1,126 @@
+"""Batched evaluation of policies over parallel Zelda 1 environments."""
+import importlib
+import gymnasium as gym
+import numpy as np
+from .navigation import NUM_LEVELS
+from .navigation import NUM_ROOMS
+
+
+# the statistics reported for each evaluated episode. frames count every
+# emulated frame (info['frames']), including the ones that steps skip
+EPISODE_STATS = ('rooms', 'deaths', 'rupees', 'steps', 'frames')
+
+
+def load_policy(spec):
+    """
+    Load a policy from an entry point.
+
+    Args:
+        spec: a 'module:callable' string, e.g., 'my_agent.policy:act'
+
+    Returns:
+        the callable, which maps a batch of observations to a batch of
+        actions
+
+    """
+    module_name, separator, attribute = spec.partition(':')
+    if not separator or not module_name or not attribute:
+        raise ValueError(f'policy must be "module:callable", got "{spec}"')
+    policy = importlib.import_module(module_name)
+    for name in attribute.split('.'):
+        policy = getattr(policy, name)
+    if not callable(policy):
+        raise TypeError(f'{spec} is not callable')
+    return policy
+
+
+def evaluate(policy, env_fns, episodes, seed=None):
+    """
+    Evaluate a policy with one batched inference call per step.
+
+    Args:
+        policy: a callable that maps a batch of observations to actions
+        env_fns: a list of functions that each build one environment, run
+            in their own worker processes. environments must truncate
+            their episodes (e.g., with max_episode_steps)
+        episodes: the number of episodes to evaluate
+        seed: an optional base seed for the first resets
+
+    Returns:
+        a list with a dictionary of EPISODE_STATS per completed episode
+
+    """
+    if episodes <= 0:
+        raise ValueError('episodes must be positive')
+    envs = gym.vector.AsyncVectorEnv(env_fns)
+    num_envs = envs.num_envs
+    everyone = np.arange(num_envs)
+    results = []
+    try:
+        observations, infos = envs.reset(seed=seed)
+        # the rooms each environment visited in its current episode
+        visited = np.zeros((num_envs, NUM_LEVELS, NUM_ROOMS), dtype=bool)
+        start_deaths = np.asarray(infos['number_of_deaths'], dtype=np.int64)
+        steps = np.zeros(num_envs, dtype=np.int64)
+        frames = np.zeros(num_envs, dtype=np.int64)
+        resetting = np.zeros(num_envs, dtype=bool)
+        while len(results) < episodes:
+            levels = np.minimum(infos['current_level'], NUM_LEVELS - 1)
+            visited[everyone, levels, infos['room']] = True
+            actions = policy(observations)
+            observations, _, terminated, truncated, infos = envs.step(actions)
+            deaths = np.asarray(infos['number_of_deaths'], dtype=np.int64)
+            # environments that finished on the last step were reset by this
+            # step (and ignored its action), so they begin a new episode
+            visited[resetting] = False
+            start_deaths[resetting] = deaths[resetting]
+            steps[resetting] = 0
+            steps[~resetting] += 1
+            frames[resetting] = 0
+            frames[~resetting] += infos['frames'][~resetting]
+            resetting = terminated | truncated
+            for index in np.flatnonzero(resetting):
+                if len(results) == episodes:
+                    break
+                level = min(infos['current_level'][index], NUM_LEVELS - 1)
+                visited[index, level, infos['room'][index]] = True
+                results.append(dict(
+                    rooms=int(visited[index].sum()),
+                    deaths=int((deaths[index] - start_deaths[index]) % 256),
+                    rupees=int(infos['rupees'][index]),
+                    steps=int(steps[index]),
+                    frames=int(frames[index]),
+                ))
+    finally:
+        envs.close()
+    return results
+
+
+def summarize(results):
+    """
+    Return the mean, minimum, and maximum of each episode statistic.
+
+    Args:
+        results: the list of episode dictionaries from evaluate
+
+    Returns:
+        a dictionary that maps each statistic to its summary
+
+    """
+    summary = {}
+    for stat in EPISODE_STATS:
+        values = np.array([result[stat] for result in results])
+        summary[stat] = dict(
+            mean=float(values.mean()),
+            min=int(values.min()),
+            max=int(values.max()),
+        )
+    return summary
+
+
+# explicitly define the outward facing API of this module
+__all__ = [
+    evaluate.__name__,
+    load_policy.__name__,
+    summarize.__name__,
+]
@@ -0,0 +1,155 @@
+"""Memory accounting for Zelda 1 environments and their wrappers."""
+from collections import deque
+import gc
+import os
+import gymnasium as gym
+import numpy as np
+from .zelda_env import ROM_PATH
+from .zelda_env import Zelda1Env
+
+
+def _arrays(layer):
+    """
+    Return the NumPy arrays held by the attributes of an environment.
+
+    Args:
+        layer: an environment or wrapper
+
+    Returns:
+        a list of the arrays held directly, in dictionaries, or in sequences
+        (e.g., the frame deque of a frame stack)
+
+    """
+    arrays = []
+    for name, value in vars(layer).items():
+        if name == 'env':
+            continue
+        if isinstance(value, dict):
+            value = list(value.values())
+        if isinstance(value, (list, tuple, deque)):
+            arrays.extend(
+                item for item in value if isinstance(item, np.ndarray))
+        elif isinstance(value, np.ndarray):
+            arrays.append(value)
+    return arrays
+
+
+def _root(array):
+    """Return the array that owns (or wraps) the memory of a view."""
+    while isinstance(array.base, np.ndarray):
+        array = array.base
+    return array
+
+
+def _emulator_arrays(env):
+    """
+    Return the buffers that the emulator of an environment exposes.
+
+    Args:
+        env: the unwrapped environment
+
+    Returns:
+        a list of the screen, RAM, and controller arrays of nes-py's public
+        API, which are views of memory that the emulator owns
+
+    """
+    return [env.screen, env.ram, *env.controllers]
+
+
+def memory_usage(env):
+    """
+    Return the bytes held by an environment and its wrappers.
+
+    Args:
+        env: a Zelda1Env or a wrapper of one
+
+    Returns:
+        a dictionary with the bytes of:
+        - rom: the cartridge that the emulator loads for this instance
+        - emulator: the emulator buffers that nes-py exposes (the screen,
+          RAM, and controllers)
+        - buffers: the other arrays held by the environment in Python
+        - wrappers: the arrays held by the wrappers (e.g., frame stacks)
+        - total: the sum of the above
+
+    Notes:
+        the PPU state and the backup state live inside the emulator where
+        Python cannot see them. rss_per_env measures them with everything
+        else. shared views of one buffer are counted once
+
+    """
+    layers = [env]
+    while isinstance(layers[-1], gym.Wrapper):
+        layers.append(layers[-1].env)
+    usage = dict(
+        rom=os.path.getsize(ROM_PATH),
+        emulator=0,
+        buffers=0,
+        wrappers=0,
+    )
+    seen = set()
+
+    def charge(key, arrays):
+        """Add the bytes of the arrays not counted yet to a key."""
+        for array in arrays:
+            root = _root(array)
+            if id(root) not in seen:
+                seen.add(id(root))
+                usage[key] += root.nbytes
+
+    # count the unwrapped environment first so wrappers that keep a view of
+    # its buffers are not charged for them
+    charge('emulator', _emulator_arrays(layers[-1]))
+    charge('buffers', _arrays(layers[-1]))
+    for layer in reversed(layers[:-1]):
+        charge('wrappers', _arrays(layer))
+    usage['total'] = sum(usage.values())
+    return usage
+
+
+def _resident_bytes():
+    """Return the resident set size of this process in bytes."""
+    with open('/proc/self/statm') as statm:
+        pages = int(statm.read().split()[1])
+    return pages * os.sysconf('SC_PAGE_SIZE')
+
+
+def rss_per_env(num_envs=16, steps=60, **kwargs):
+    """
+    Measure the resident memory of each environment in this process.
+
+    Args:
+        num_envs: the number of environments to create
+        steps: the number of NOOP steps to take in each environment so that
+            its buffers are touched
+        kwargs: keyword arguments for Zelda1Env, e.g., low_memory=True
+
+    Returns:
+        the growth of the resident set size per environment in bytes
+
+    Notes:
+        this reads /proc/self/statm and therefore requires Linux
+
+    """
+    if num_envs <= 0:
+        raise ValueError('num_envs must be positive')
+    gc.collect()
+    before = _resident_bytes()
+    envs = [Zelda1Env(**kwargs) for _ in range(num_envs)]
+    try:
+        for env in envs:
+            env.reset(seed=0)
+            for _ in range(steps):
+                env.step(0)
+        gc.collect()
+        return (_resident_bytes() - before) / num_envs
+    finally:
+        for env in envs:
+            env.close()
+
+
+# explicitly define the outward facing API of this module
+__all__ = [
+    memory_usage.__name__,
+    rss_per_env.__name__,
+]
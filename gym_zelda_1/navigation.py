@@ -0,0 +1,252 @@
+"""A room adjacency graph of Zelda 1 with precomputed shortest paths."""
+import os
+import numpy as np
+
+
+# the path to the packaged graph of the overworld and the first quest
+# dungeons (generated by gym_zelda_1._app.rooms)
+ROOM_GRAPH_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '_rooms', 'room_graph.npz')
+
+
+# the number of levels (0 is the overworld, 1-9 are the dungeons)
+NUM_LEVELS = 10
+
+
+# the shape of the grid of rooms in a level (rows, columns)
+ROOM_GRID_SHAPE = (8, 16)
+
+
+# the number of rooms in a level
+NUM_ROOMS = ROOM_GRID_SHAPE[0] * ROOM_GRID_SHAPE[1]
+
+
+# the types of edges between neighboring rooms
+WALL = 0
+OPEN = 1
+LOCKED = 2
+BOMBABLE = 3
+
+
+# the exits of a room in edge order (matching zelda_env.DIRECTIONS labels)
+EXITS = ('N', 'S', 'E', 'W')
+
+
+# the change in room ID when leaving a room through each exit
+_EXIT_OFFSETS = np.array([-ROOM_GRID_SHAPE[1], ROOM_GRID_SHAPE[1], 1, -1])
+
+
+# the exit on the far side of each exit (N <-> S, E <-> W)
+_OPPOSITE_EXITS = np.array([1, 0, 3, 2])
+
+
+# the distance between rooms that cannot reach each other
+UNREACHABLE = 255
+
+
+def _neighbors():
+    """
+    Return the room on the far side of each exit of each room.
+
+    Returns:
+        an int array with shape (NUM_ROOMS, len(EXITS)) where -1 marks exits
+        that leave the room grid
+
+    """
+    rows, columns = np.divmod(np.arange(NUM_ROOMS), ROOM_GRID_SHAPE[1])
+    neighbors = np.arange(NUM_ROOMS)[:, None] + _EXIT_OFFSETS
+    neighbors[rows == 0, 0] = -1
+    neighbors[rows == ROOM_GRID_SHAPE[0] - 1, 1] = -1
+    neighbors[columns == ROOM_GRID_SHAPE[1] - 1, 2] = -1
+    neighbors[columns == 0, 3] = -1
+    return neighbors
+
+
+# the room on the far side of each exit of each room
+NEIGHBORS = _neighbors()
+
+
+def _all_pairs_distances(adjacency):
+    """
+    Return the breadth-first distances between all pairs of rooms.
+
+    Args:
+        adjacency: a bool array with shape (levels, rooms, rooms)
+
+    Returns:
+        a uint8 array of hop counts with the same shape (UNREACHABLE where
+        there is no path)
+
+    """
+    adjacency = adjacency.astype(np.float32)
+    distances = np.full(adjacency.shape, UNREACHABLE, dtype=np.uint8)
+    frontier = np.broadcast_to(np.eye(NUM_ROOMS, dtype=bool), adjacency.shape)
+    visited = frontier.copy()
+    hops = 0
+    # expand every source room of every level one hop per matrix product
+    while frontier.any() and hops < UNREACHABLE:
+        distances[frontier] = hops
+        hops += 1
+        frontier = (frontier.astype(np.float32) @ adjacency > 0) & ~visited
+        visited |= frontier
+    return distances
+
+
+class RoomGraph:
+    """A room adjacency graph with O(1) distance lookups."""
+
+    def __init__(self, edges, passable=(OPEN,)):
+        """
+        Initialize a new room graph.
+
+        Args:
+            edges: a uint8 array with shape (NUM_LEVELS, NUM_ROOMS, 4) of
+                the edge type of each exit (in EXITS order) of each room
+            passable: the edge types that a path may use, e.g., include
+                LOCKED for an agent with keys or BOMBABLE with bombs
+
+        Returns:
+            None
+
+        """
+        edges = np.asarray(edges, dtype=np.uint8)
+        shape = (NUM_LEVELS, NUM_ROOMS, len(EXITS))
+        if edges.shape != shape:
+            raise ValueError(f'edges must have shape {shape}')
+        self.edges = edges.copy()
+        self.passable = tuple(passable)
+        self._distances = None
+
+    @classmethod
+    def default(cls, passable=(OPEN,)):
+        """
+        Return the default graph of the game.
+
+        Args:
+            passable: the edge types that a path may use
+
+        Returns:
+            the packaged graph of the walkable edges between overworld
+            screens and the doors (open, locked, bombable, or walls) between
+            the rooms of each first quest dungeon
+
+        Notes:
+            stairways, caves, and warps are not edges of the room grid, so
+            rooms that are only reached through them are unreachable until
+            their transitions are added with RoomGraph.observe
+
+        """
+        return cls.load(ROOM_GRAPH_PATH, passable=passable)
+
+    @classmethod
+    def load(cls, path, passable=(OPEN,)):
+        """
+        Load a graph saved with RoomGraph.save.
+
+        Args:
+            path: the path of the .npz file to load
+            passable: the edge types that a path may use
+
+        Returns:
+            the loaded graph (with its precomputed distances if they match
+            the passable edge types)
+
+        """
+        with np.load(path) as data:
+            graph = cls(data['edges'], passable=passable)
+            if tuple(data['passable']) == graph.passable:
+                graph._distances = data['distances']
+        return graph
+
+    def save(self, path):
+        """
+        Save the graph and its precomputed distances as compact arrays.
+
+        Args:
+            path: the path of the .npz file to write
+
+        Returns:
+            None
+
+        """
+        np.savez_compressed(path,
+            edges=self.edges,
+            passable=np.array(self.passable, dtype=np.uint8),
+            distances=self.distances,
+        )
+
+    @property
+    def adjacency(self):
+        """Return a (levels, rooms, rooms) bool array of passable edges."""
+        open_exits = np.isin(self.edges, self.passable) & (NEIGHBORS >= 0)
+        adjacency = np.zeros((NUM_LEVELS, NUM_ROOMS, NUM_ROOMS), dtype=bool)
+        levels, rooms, exits = np.nonzero(open_exits)
+        adjacency[levels, rooms, NEIGHBORS[rooms, exits]] = True
+        return adjacency
+
+    @property
+    def distances(self):
+        """Return the (levels, rooms, rooms) uint8 all-pairs hop counts."""
+        if self._distances is None:
+            self._distances = _all_pairs_distances(self.adjacency)
+        return self._distances
+
+    def distance(self, level, room, goal):
+        """
+        Return the number of room transitions between two rooms.
+
+        Args:
+            level: the level (or array of levels) of the rooms
+            room: the room (or array of rooms) to start from
+            goal: the room (or array of rooms) to reach
+
+        Returns:
+            the hop count (or array of hop counts), UNREACHABLE if none
+
+        """
+        return self.distances[level, room, goal]
+
+    def distance_to_goal(self, level, goal):
+        """
+        Return the distance of every room of a level to a goal room.
+
+        Args:
+            level: the level of the goal
+            goal: the goal room
+
+        Returns:
+            a uint8 array of NUM_ROOMS distances to index with the room ID
+
+        """
+        return self.distances[level, :, goal]
+
+    def observe(self, level, room, next_room, edge=OPEN):
+        """
+        Add the edge of an observed transition between neighboring rooms.
+
+        Args:
+            level: the level of the transition
+            room: the room that Link left
+            next_room: the room that Link entered
+            edge: the type of the edge that was crossed
+
+        Returns:
+            True if the graph changed, False otherwise
+
+        """
+        exits = np.flatnonzero(NEIGHBORS[room] == next_room)
+        if not len(exits):
+            # transitions between rooms that are not neighbors (e.g., caves,
+            # stairways, or warps) are not edges of the grid
+            return False
+        exit_ = exits[0]
+        if self.edges[level, room, exit_] == edge:
+            return False
+        self.edges[level, room, exit_] = edge
+        self.edges[level, next_room, _OPPOSITE_EXITS[exit_]] = edge
+        self._distances = None
+        return True
+
+
+# explicitly define the outward facing API of this module
+__all__ = [RoomGraph.__name__]
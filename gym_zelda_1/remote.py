@@ -0,0 +1,436 @@
+"""An asyncio server and client for stepping environments in another process."""
+import asyncio
+import json
+import struct
+import numpy as np
+from .codec import FrameDecoder
+from .codec import FrameEncoder
+from ._spaces import observation_dtype
+from .zelda_env import INFO_RECORD_DTYPE
+
+
+# the header that prefixes every message: opcode, status, number of
+# environments, and the size of the payload that follows in bytes
+_HEADER = struct.Struct('<BBHI')
+
+
+# the opcodes of the protocol
+OPEN = 1
+RESET = 2
+STEP = 3
+CLOSE = 4
+
+
+# the status codes of a response
+_OK = 0
+_ERROR = 1
+
+
+# the seed value that stands for "no seed" in a reset request
+_NO_SEED = -1
+
+
+# the flag in an open request that asks for delta encoded observations
+_DELTA = 0x01
+
+
+# the type of the per-environment sizes that prefix delta encoded observations
+_SIZE_DTYPE = np.dtype('<u4')
+
+
+def _stack(observations, dtype):
+    """
+    Stack a batch of observations.
+
+    Args:
+        observations: a sequence of arrays, or of dictionaries of arrays
+        dtype: the dtype of an observation (structured for dictionaries)
+
+    Returns:
+        an array with one observation per row, where the rows of dictionary
+        observations are records of the structured dtype
+
+    """
+    if dtype.names is None:
+        return np.stack(observations)
+    batch = np.empty(len(observations), dtype=dtype)
+    for key in dtype.names:
+        batch[key] = [observation[key] for observation in observations]
+    return batch
+
+
+def _as_bytes(array):
+    """Return a flat byte view of a contiguous NumPy array without copying."""
+    return memoryview(np.ascontiguousarray(array).reshape(-1).view(np.uint8))
+
+
+async def _read_message(reader):
+    """
+    Read a single framed message from a stream.
+
+    Args:
+        reader: the asyncio stream reader to read from
+
+    Returns:
+        a tuple of (opcode, status, count, payload)
+
+    """
+    header = await reader.readexactly(_HEADER.size)
+    opcode, status, count, size = _HEADER.unpack(header)
+    payload = await reader.readexactly(size) if size else b''
+    return opcode, status, count, payload
+
+
+def _write_message(writer, opcode, count, buffers=(), status=_OK):
+    """
+    Write a single framed message to a stream.
+
+    Args:
+        writer: the asyncio stream writer to write to
+        opcode: the opcode of the message
+        count: the number of environments the message refers to
+        buffers: the byte buffers to send (in order) as the payload
+        status: the status code of the message
+
+    Returns:
+        None
+
+    """
+    buffers = [memoryview(buffer) for buffer in buffers]
+    size = sum(buffer.nbytes for buffer in buffers)
+    writer.writelines([_HEADER.pack(opcode, status, count, size), *buffers])
+
+
+class EnvServer:
+    """A pool of environments hosted behind a binary asyncio protocol."""
+
+    def __init__(self, env_fn, num_envs):
+        """
+        Initialize a new environment server.
+
+        Args:
+            env_fn: a callable that returns a new environment
+            num_envs: the number of environments in the pool
+
+        Returns:
+            None
+
+        """
+        if num_envs <= 0:
+            raise ValueError('num_envs must be positive')
+        self.envs = [env_fn() for _ in range(num_envs)]
+        self._free = list(range(num_envs))
+        self._server = None
+        # Dict observations (e.g., obs_type='tiles') are sent as records of
+        # a structured dtype with one field per key, like ReplayBuffer stores
+        shape, dtype = observation_dtype(self.envs[0].observation_space)
+        self._dtype = np.dtype(dtype)
+        if self._dtype.names is None:
+            fields = None
+        else:
+            fields = [
+                [name, self._dtype[name].base.str, self._dtype[name].shape]
+                for name in self._dtype.names
+            ]
+        self._spec = json.dumps(dict(
+            shape=list(shape),
+            dtype=self._dtype.str,
+            fields=fields,
+            num_actions=int(self.envs[0].action_space.n),
+        )).encode()
+
+    @property
+    def address(self):
+        """Return the address the server listens on."""
+        return self._server.sockets[0].getsockname()
+
+    async def start(self, host='127.0.0.1', port=0, path=None):
+        """
+        Start listening for clients.
+
+        Args:
+            host: the host to bind a TCP socket to
+            port: the port to bind a TCP socket to (0 picks a free port)
+            path: the path of a Unix domain socket to bind instead of TCP
+
+        Returns:
+            None
+
+        """
+        if path is None:
+            self._server = await asyncio.start_server(self._serve, host, port)
+        else:
+            self._server = await asyncio.start_unix_server(self._serve, path)
+
+    async def serve_forever(self):
+        """Serve clients until the server is closed."""
+        await self._server.serve_forever()
+
+    async def close(self):
+        """Stop listening for clients and close the environment pool."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        for env in self.envs:
+            env.close()
+
+    async def _serve(self, reader, writer):
+        """Serve a single client connection until it closes."""
+        leased = []
+        encoders = []
+        try:
+            while True:
+                try:
+                    opcode, _, count, payload = await _read_message(reader)
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                if opcode == CLOSE:
+                    break
+                try:
+                    buffers = await self._dispatch(
+                        opcode, count, payload, leased, encoders)
+                except Exception as error:
+                    message = f'{type(error).__name__}: {error}'.encode()
+                    _write_message(writer, opcode, 0, [message], status=_ERROR)
+                else:
+                    _write_message(writer, opcode, len(leased), buffers)
+                await writer.drain()
+        finally:
+            # return the leased environments to the pool for the next client
+            self._free.extend(leased)
+            writer.close()
+
+    async def _dispatch(self, opcode, count, payload, leased, encoders):
+        """Handle a single request and return the response buffers."""
+        if opcode == OPEN:
+            if leased:
+                raise ValueError('environments are already open')
+            if not 0 < count <= len(self._free):
+                raise ValueError(f'{len(self._free)} environments are free')
+            leased.extend(self._free[:count])
+            del self._free[:count]
+            if payload and payload[0] & _DELTA:
+                if self._dtype.names is not None:
+                    raise ValueError('delta encoding needs Box observations')
+                encoders.extend(FrameEncoder() for _ in range(count))
+            return [self._spec]
+        if not leased:
+            raise ValueError('no environments are open')
+        envs = [self.envs[index] for index in leased]
+        if opcode == RESET:
+            seeds = np.frombuffer(payload, dtype=np.int64, count=len(envs))
+            # start each new episode of a delta stream with a key frame
+            for encoder in encoders:
+                encoder.reset()
+            calls = [
+                lambda env=env, seed=int(seed): self._reset(env, seed)
+                for env, seed in zip(envs, seeds)
+            ]
+        elif opcode == STEP:
+            actions = np.frombuffer(payload, dtype=np.uint8, count=len(envs))
+            calls = [
+                lambda env=env, action=int(action): env.step(action)
+                for env, action in zip(envs, actions)
+            ]
+        else:
+            raise ValueError(f'unknown opcode {opcode}')
+        # the emulators release the GIL, so the batch steps in parallel
+        loop = asyncio.get_running_loop()
+        results = await asyncio.gather(*[
+            loop.run_in_executor(None, call) for call in calls
+        ])
+        return self._pack(envs, results, encoders, self._dtype)
+
+    @staticmethod
+    def _reset(env, seed):
+        """Reset an environment and return a transition-shaped result."""
+        observation, info = env.reset(seed=None if seed == _NO_SEED else seed)
+        return observation, 0.0, False, False, info
+
+    @staticmethod
+    def _pack(envs, results, encoders, dtype):
+        """Pack a batch of transitions into response buffers."""
+        observations, rewards, terminated, truncated, _ = zip(*results)
+        records = np.empty(len(envs), dtype=INFO_RECORD_DTYPE)
+        for index, env in enumerate(envs):
+            records[index] = env.unwrapped.info_record()
+        if encoders:
+            frames = [
+                encoder.encode(observation)
+                for encoder, observation in zip(encoders, observations)
+            ]
+            sizes = np.array([len(frame) for frame in frames], _SIZE_DTYPE)
+            observations = [_as_bytes(sizes), *frames]
+        else:
+            observations = [_as_bytes(_stack(observations, dtype))]
+        return [
+            *observations,
+            _as_bytes(np.array(rewards, dtype=np.float32)),
+            _as_bytes(np.array(terminated, dtype=bool)),
+            _as_bytes(np.array(truncated, dtype=bool)),
+            _as_bytes(records),
+        ]
+
+
+class EnvClient:
+    """An asyncio client for environments leased from an EnvServer."""
+
+    def __init__(self, reader, writer):
+        """
+        Initialize a new client over an open connection.
+
+        Args:
+            reader: the asyncio stream reader of the connection
+            writer: the asyncio stream writer of the connection
+
+        Returns:
+            None
+
+        """
+        self._reader = reader
+        self._writer = writer
+        self.num_envs = 0
+        self._decoders = []
+        self.observation_shape = None
+        self.observation_dtype = None
+        self.num_actions = None
+
+    @classmethod
+    async def connect(cls,
+        num_envs=1,
+        host='127.0.0.1',
+        port=None,
+        path=None,
+        delta=False,
+    ):
+        """
+        Connect to a server and lease a batch of environments.
+
+        Args:
+            num_envs: the number of environments to lease
+            host: the host of a TCP server
+            port: the port of a TCP server
+            path: the path of a Unix domain socket server to use instead
+            delta: whether to receive delta encoded observations, which
+                shrinks messages when consecutive frames are similar
+
+        Returns:
+            a new connected client
+
+        """
+        if path is None:
+            reader, writer = await asyncio.open_connection(host, port)
+        else:
+            reader, writer = await asyncio.open_unix_connection(path)
+        client = cls(reader, writer)
+        try:
+            flags = bytes([_DELTA if delta else 0])
+            spec = await client._request(OPEN, num_envs, [flags])
+            spec = json.loads(bytes(spec))
+        except BaseException:
+            writer.close()
+            raise
+        client.num_envs = num_envs
+        if delta:
+            client._decoders = [FrameDecoder() for _ in range(num_envs)]
+        client.observation_shape = tuple(spec['shape'])
+        if spec['fields'] is None:
+            client.observation_dtype = np.dtype(spec['dtype'])
+        else:
+            client.observation_dtype = np.dtype([
+                (name, dtype, tuple(shape))
+                for name, dtype, shape in spec['fields']
+            ])
+        client.num_actions = spec['num_actions']
+        return client
+
+    async def _request(self, opcode, count, buffers=()):
+        """Send a request and return the payload of the response."""
+        _write_message(self._writer, opcode, count, buffers)
+        await self._writer.drain()
+        _, status, _, payload = await _read_message(self._reader)
+        if status != _OK:
+            raise RuntimeError(bytes(payload).decode())
+        return payload
+
+    def _unpack(self, payload):
+        """Unpack a batch of transitions as views of a response payload."""
+        count = self.num_envs
+        offset = 0
+        arrays = []
+        if self._decoders:
+            sizes = np.frombuffer(payload, _SIZE_DTYPE, count=count)
+            offset = sizes.nbytes
+            frames = []
+            for decoder, size in zip(self._decoders, sizes.tolist()):
+                frame = memoryview(payload)[offset:offset + size]
+                frames.append(decoder.decode(frame))
+                offset += size
+            arrays.append(np.stack(frames))
+            layout = []
+        else:
+            layout = [(self.observation_dtype, (count, *self.observation_shape))]
+        layout += [
+            (np.float32, (count,)),
+            (bool, (count,)),
+            (bool, (count,)),
+            (INFO_RECORD_DTYPE, (count,)),
+        ]
+        for dtype, shape in layout:
+            size = int(np.prod(shape))
+            array = np.frombuffer(payload, dtype, count=size, offset=offset)
+            arrays.append(array.reshape(shape))
+            offset += array.nbytes
+        return arrays
+
+    async def reset(self, seeds=None):
+        """
+        Reset the leased environments.
+
+        Args:
+            seeds: an optional sequence of seeds (None entries are unseeded)
+
+        Returns:
+            a tuple of (observations, info records)
+
+        """
+        if seeds is None:
+            seeds = [None] * self.num_envs
+        seeds = np.array([_NO_SEED if s is None else s for s in seeds], np.int64)
+        payload = await self._request(RESET, self.num_envs, [_as_bytes(seeds)])
+        observations, _, _, _, infos = self._unpack(payload)
+        return observations, infos
+
+    async def step(self, actions):
+        """
+        Step the leased environments.
+
+        Args:
+            actions: a sequence of one action per leased environment
+
+        Returns:
+            a tuple of (observations, rewards, terminated, truncated, infos)
+
+        """
+        actions = np.asarray(actions, dtype=np.uint8)
+        if actions.shape != (self.num_envs,):
+            raise ValueError(f'expected {self.num_envs} actions')
+        payload = await self._request(STEP, self.num_envs, [_as_bytes(actions)])
+        return tuple(self._unpack(payload))
+
+    async def close(self):
+        """Release the leased environments and close the connection."""
+        _write_message(self._writer, CLOSE, 0)
+        await self._writer.drain()
+        # the server releases the environments before closing its end
+        await self._reader.read()
+        self._writer.close()
+        await self._writer.wait_closed()
+
+
+# explicitly define the outward facing API of this module
+__all__ = [
+    EnvClient.__name__,
+    EnvServer.__name__,
+]
@@ -0,0 +1,219 @@
+"""A replay buffer of Zelda 1 transitions backed by memory-mapped files."""
+import json
+import os
+import numpy as np
+from ._spaces import observation_dtype
+from .zelda_env import INFO_RECORD_DTYPE
+
+
+# the name of the file that holds the write position of a buffer
+_STATE_FILE = 'state.json'
+
+
+class ReplayBuffer:
+    """A ring buffer of transitions stored in memory-mapped .npy files."""
+
+    def __init__(self, directory, capacity=None, observation_space=None):
+        """
+        Create a new buffer or open an existing one.
+
+        Args:
+            directory: the directory that holds the buffer's files
+            capacity: the number of frames to store (to create a buffer)
+            observation_space: the observation space of the environment (to
+                create a buffer)
+
+        Returns:
+            None
+
+        Notes:
+            each slot holds one observation and the transition taken from
+            it, so the next observation of a transition is the next slot and
+            no observation (or frame stack) is ever stored twice
+
+        """
+        self.directory = directory
+        create = capacity is not None
+        shape, dtype = (), None
+        if create:
+            if capacity <= 1:
+                raise ValueError('capacity must be greater than 1')
+            os.makedirs(directory, exist_ok=True)
+            shape, dtype = observation_dtype(observation_space)
+
+        def memmap(name, dtype, shape=()):
+            """Create or open the memory-mapped .npy file of an array."""
+            path = os.path.join(directory, f'{name}.npy')
+            if not create:
+                return np.lib.format.open_memmap(path, mode='r+')
+            return np.lib.format.open_memmap(path,
+                mode='w+',
+                dtype=dtype,
+                shape=(capacity, *shape),
+            )
+
+        self.observations = memmap('observations', dtype, shape)
+        self.actions = memmap('actions', np.uint8)
+        self.rewards = memmap('rewards', np.float32)
+        self.terminated = memmap('terminated', bool)
+        self.truncated = memmap('truncated', bool)
+        self.infos = memmap('infos', INFO_RECORD_DTYPE)
+        # whether a slot begins an episode, holds a complete transition, and
+        # the global step at which it was written (to detect overwrites)
+        self.first = memmap('first', bool)
+        self.valid = memmap('valid', bool)
+        self.stamps = memmap('stamps', np.int64)
+        self.capacity = len(self.actions)
+        if create:
+            self.valid[:] = False
+            self.stamps[:] = -1
+            self.step = 0
+        else:
+            with open(os.path.join(directory, _STATE_FILE)) as state:
+                self.step = json.load(state)['step']
+
+    def __len__(self):
+        """Return the number of slots that hold an observation."""
+        return int(min(self.step, self.capacity))
+
+    def _write(self, observation, info, first):
+        """Write an observation to the next slot."""
+        cursor = self.step % self.capacity
+        if isinstance(observation, dict):
+            for key, value in observation.items():
+                self.observations[key][cursor] = value
+        else:
+            self.observations[cursor] = observation
+        self.infos[cursor] = info
+        self.first[cursor] = first
+        self.valid[cursor] = False
+        self.stamps[cursor] = self.step
+        self.step += 1
+
+    def reset(self, observation, info):
+        """
+        Begin a new episode.
+
+        Args:
+            observation: the first observation of the episode
+            info: the structured info record of the first observation
+
+        Returns:
+            None
+
+        """
+        self._write(observation, info, True)
+
+    def append(self, action, reward, terminated, truncated, observation, info):
+        """
+        Append a transition from the latest observation in O(1).
+
+        Args:
+            action: the uint8 action (e.g., an index into MOVEMENT)
+            reward: the reward of the transition
+            terminated: whether the transition terminated the episode
+            truncated: whether the transition truncated the episode
+            observation: the next observation
+            info: the structured info record of the next observation
+
+        Returns:
+            None
+
+        """
+        if self.step == 0:
+            raise ValueError('call reset with the first observation first')
+        latest = (self.step - 1) % self.capacity
+        self.actions[latest] = action
+        self.rewards[latest] = reward
+        self.terminated[latest] = terminated
+        self.truncated[latest] = truncated
+        self.valid[latest] = True
+        self._write(observation, info, False)
+
+    def flush(self):
+        """Flush the buffer's files and write position to disk."""
+        for array in (
+            self.observations, self.actions, self.rewards, self.terminated,
+            self.truncated, self.infos, self.first, self.valid, self.stamps,
+        ):
+            array.flush()
+        with open(os.path.join(self.directory, _STATE_FILE), 'w') as state:
+            json.dump(dict(step=self.step), state)
+
+    def _sample_indices(self, batch_size, rng, attempts=100):
+        """Return uniformly sampled indices of complete transitions."""
+        size = len(self)
+        indices = rng.integers(size, size=batch_size)
+        invalid = ~self.valid[indices]
+        # redraw the (few) slots without a complete transition, i.e., the
+        # latest slot and the last observation of each episode
+        for _ in range(attempts):
+            if not invalid.any():
+                return indices
+            indices[invalid] = rng.integers(size, size=int(invalid.sum()))
+            invalid = ~self.valid[indices]
+        raise ValueError('the buffer has too few complete transitions')
+
+    def stack_indices(self, indices, stack):
+        """
+        Return the slots of the frame stacks that end at each index.
+
+        Args:
+            indices: an array of slot indices
+            stack: the number of frames in each stack
+
+        Returns:
+            an array with shape (len(indices), stack) of slots, oldest first.
+            stacks that would cross the start of an episode (or data that
+            has been overwritten) repeat the episode's first frame
+
+        """
+        slots = np.empty((len(indices), stack), dtype=np.int64)
+        slots[:, -1] = current = np.asarray(indices)
+        for offset in range(2, stack + 1):
+            previous = (current - 1) % self.capacity
+            contiguous = ~self.first[current]
+            contiguous &= self.stamps[previous] == self.stamps[current] - 1
+            current = np.where(contiguous, previous, current)
+            slots[:, -offset] = current
+        return slots
+
+    def sample(self, batch_size, stack=1, rng=None):
+        """
+        Sample a batch of transitions.
+
+        Args:
+            batch_size: the number of transitions to sample
+            stack: the number of frames to stack into each observation
+            rng: an optional NumPy random generator
+
+        Returns:
+            a dictionary of batched arrays: observations and
+            next_observations with shape (batch, stack, ...) (views of a
+            single gather of stack + 1 frames), actions, rewards,
+            terminated, truncated, infos, and next_infos
+
+        """
+        rng = np.random.default_rng() if rng is None else rng
+        indices = self._sample_indices(batch_size, rng)
+        following = (indices + 1) % self.capacity
+        slots = np.concatenate([
+            self.stack_indices(indices, stack),
+            following[:, None],
+        ], axis=1)
+        frames = self.observations[slots]
+        return dict(
+            indices=indices,
+            observations=frames[:, :-1],
+            next_observations=frames[:, 1:],
+            actions=self.actions[indices],
+            rewards=self.rewards[indices],
+            terminated=self.terminated[indices],
+            truncated=self.truncated[indices],
+            infos=self.infos[indices],
+            next_infos=self.infos[following],
+        )
+
+
+# explicitly define the outward facing API of this module
+__all__ = [ReplayBuffer.__name__]
@@ -0,0 +1,153 @@
+"""Goal-conditioned tasks with vectorized success predicates."""
+import numpy as np
+
+
+# the object slots that hold the enemies of a room. the last enemy slot (11)
+# is left out because the overworld keeps a non-enemy object (types 0x63 and
+# 0x64) in it for the whole time that Link is in a room
+ENEMY_SLOTS = slice(1, 11)
+
+
+# the controller byte that walks Link through each exit of a room
+EXIT_BUTTONS = {
+    'N': 0b00010000,
+    'S': 0b00100000,
+    'E': 0b10000000,
+    'W': 0b01000000,
+}
+
+
+def sword_acquired(records, objects):
+    """
+    Return whether Link has a sword.
+
+    Args:
+        records: an array of INFO_RECORD_DTYPE records with any shape
+        objects: the matching object tables with shape (..., 20, 5)
+
+    Returns:
+        a boolean array with the shape of records
+
+    """
+    return records['sword'] > 0
+
+
+def rupees_collected(records, objects, count):
+    """
+    Return whether Link holds at least a number of rupees.
+
+    Args:
+        records: an array of INFO_RECORD_DTYPE records with any shape
+        objects: the matching object tables with shape (..., 20, 5)
+        count: the number of rupees to collect
+
+    Returns:
+        a boolean array with the shape of records
+
+    """
+    return records['rupees'] >= count
+
+
+def room_reached(records, objects, level, room):
+    """
+    Return whether Link is in a room.
+
+    Args:
+        records: an array of INFO_RECORD_DTYPE records with any shape
+        objects: the matching object tables with shape (..., 20, 5)
+        level: the level of the room (0 is the overworld)
+        room: the ID of the room in its level
+
+    Returns:
+        a boolean array with the shape of records
+
+    """
+    return (records['current_level'] == level) & (records['room'] == room)
+
+
+def room_cleared(records, objects, level, room):
+    """
+    Return whether Link defeated every enemy of a room.
+
+    Args:
+        records: an array of INFO_RECORD_DTYPE records with any shape
+        objects: the matching object tables with shape (..., 20, 5)
+        level: the level of the room (0 is the overworld)
+        room: the ID of the room in its level
+
+    Returns:
+        a boolean array with the shape of records
+
+    """
+    enemies = objects[..., ENEMY_SLOTS, 0].any(axis=-1)
+    killed = records['killed_enemies'] > 0
+    return room_reached(records, objects, level, room) & killed & ~enemies
+
+
+# the predicate, the exits to walk through from the start screen to the start
+# state, and the default parameters of each task. only clear_room has exits;
+# the other tasks start on the start screen, which holds the sword cave and
+# borders the default room of reach_room
+TASKS = {
+    'get_sword': (sword_acquired, (), {}),
+    'rupees': (rupees_collected, (), dict(count=5)),
+    'reach_room': (room_reached, (), dict(level=0, room=0x67)),
+    'clear_room': (room_cleared, ('W',), dict(level=0, room=0x76)),
+}
+
+
+class Task:
+    """A goal with a start state and a vectorized success predicate."""
+
+    def __init__(self, name, **params):
+        """
+        Initialize a new task.
+
+        Args:
+            name: the name of the task in TASKS
+            params: parameters that override the task's defaults (e.g.,
+                count for 'rupees' or level and room for 'reach_room')
+
+        Returns:
+            None
+
+        """
+        if name not in TASKS:
+            raise ValueError(f'task must be one of {sorted(TASKS)}')
+        predicate, exits, defaults = TASKS[name]
+        unknown = set(params) - set(defaults)
+        if unknown:
+            raise TypeError(f'unknown parameters for {name}: {unknown}')
+        self.name = name
+        self.predicate = predicate
+        self.exits = exits
+        self.params = {**defaults, **params}
+
+    def __repr__(self):
+        """Return a debugging representation of this task."""
+        return f'{self.__class__.__name__}({self.name!r}, **{self.params})'
+
+    def success(self, records, objects):
+        """
+        Return whether each state completes the task.
+
+        Args:
+            records: an array of INFO_RECORD_DTYPE records with any shape,
+                e.g., one per environment of a batch
+            objects: the matching object tables with shape (..., 20, 5)
+
+        Returns:
+            a boolean array with the shape of records
+
+        """
+        return np.asarray(self.predicate(records, objects, **self.params))
+
+
+# explicitly define the outward facing API of this module
+__all__ = [
+    Task.__name__,
+    room_cleared.__name__,
+    room_reached.__name__,
+    rupees_collected.__name__,
+    sword_acquired.__name__,
+]
@@ -0,0 +1,161 @@
+"""Test cases for the Go-Explore cell archive."""
+from unittest import TestCase
+import numpy as np
+from ..archive import CellArchive
+from ..archive import cell_keys
+from ..zelda_env import INFO_RECORD_DTYPE
+
+
+def _records(**fields):
+    """Return a batch of info records with the given field values."""
+    size = max(len(np.atleast_1d(value)) for value in fields.values())
+    records = np.zeros(size, dtype=INFO_RECORD_DTYPE)
+    for name, value in fields.items():
+        records[name] = value
+    return records
+
+
+class CellKeysTest(TestCase):
+    """Tests for the vectorized cell hashing."""
+
+    def test_positions_snap_to_cells(self):
+        """Positions in the same cell share a key and others do not."""
+        records = _records(x_pos=[0, 15, 16, 0], y_pos=[0, 15, 0, 16])
+        keys = cell_keys(records)
+        self.assertEqual(np.uint64, keys.dtype)
+        self.assertEqual(keys[0], keys[1])
+        self.assertEqual(3, len(np.unique(keys)))
+
+    def test_every_field_changes_the_key(self):
+        """Level, room, keys, sword, and each item bit are distinct cells."""
+        base = _records(room=[0x77])
+        keys = {int(cell_keys(base)[0])}
+        for name in ('current_level', 'room', 'keys', 'sword', 'has_bow',
+                'has_magic_shield', 'ring_type'):
+            records = base.copy()
+            records[name] += 1
+            keys.add(int(cell_keys(records)[0]))
+        self.assertEqual(8, len(keys))
+
+    def test_counts_do_not_split_item_cells(self):
+        """Item fields only contribute whether they are present."""
+        keys = cell_keys(_records(potion_type=[1, 2]))
+        self.assertEqual(keys[0], keys[1])
+
+
+class CellArchiveTest(TestCase):
+    """Tests for adding, improving, sampling, and replaying cells."""
+
+    def test_update_adds_cells_and_counts_visits(self):
+        """New keys become cells and repeated keys count visits."""
+        archive = CellArchive(capacity=1)
+        segments = [archive.start() for _ in range(3)]
+        records = _records(room=[1, 2, 1])
+        improved = archive.update(segments, records, [0, 0, 0])
+
+        self.assertEqual(2, len(archive))
+        self.assertEqual(2, improved.sum())
+        rows = archive.find(_records(room=[1, 2, 3]))
+        self.assertEqual(-1, rows[2])
+        self.assertEqual([2, 1], archive.visits[rows[:2]].tolist())
+
+        archive.update(segments[:1], records[:1], [0])
+        self.assertEqual(3, archive.visits[rows[0]])
+
+    def test_better_trajectories_replace_cells(self):
+        """Cells keep the highest score, then the shortest trajectory."""
+        archive = CellArchive()
+        record = _records(room=[5])
+        long_, short = archive.start(), archive.start()
+        archive.append([long_, long_, short], [1, 2, 3])
+        archive.update([long_], record, [1.0])
+        row = archive.find(record)[0]
+
+        self.assertFalse(archive.update([short], record, [0.5])[0])
+        self.assertEqual([1, 2], archive.trajectory(row).tolist())
+        self.assertTrue(archive.update([short], record, [1.0])[0])
+        self.assertEqual([3], archive.trajectory(row).tolist())
+
+    def test_trajectories_share_and_keep_prefixes(self):
+        """Segments continue from a cell without copying its actions."""
+        archive = CellArchive()
+        first = archive.start()
+        archive.append([first, first], [1, 2])
+        archive.update([first], _records(room=[1]), [0])
+        parent = archive.find(_records(room=[1]))[0]
+        # the first explorer keeps going after the cell was archived
+        archive.append([first], [9])
+
+        child = archive.start(parent)
+        archive.append([child], [3])
+        archive.update([child], _records(room=[2]), [0])
+        row = archive.find(_records(room=[2]))[0]
+        self.assertEqual([1, 2, 3], archive.trajectory(row).tolist())
+        self.assertEqual([1, 2], archive.trajectory(parent).tolist())
+
+    def test_select_favors_rarely_chosen_cells(self):
+        """Selection prefers cells that have been chosen and visited less."""
+        archive = CellArchive()
+        segments = [archive.start() for _ in range(2)]
+        archive.update(segments, _records(room=[1, 2]), [0, 0])
+        archive.chosen[0] = 10_000
+        archive.visits[0] = 10_000
+        rows = archive.select(1000, rng=np.random.default_rng(0))
+        self.assertGreater((rows == 1).sum(), 900)
+        self.assertEqual(10_000 + (rows == 0).sum(), archive.chosen[0])
+
+        with self.assertRaises(ValueError):
+            CellArchive().select(1)
+
+    def test_restore_replays_the_trajectory(self):
+        """Restoring steps an environment through the cell's actions."""
+        archive = CellArchive()
+        segment = archive.start()
+        archive.append([segment, segment], [4, 7])
+        archive.update([segment], _records(room=[1]), [0])
+
+        class Env:
+            actions = []
+
+            def step(self, action):
+                self.actions.append(action)
+                return action
+
+        env = Env()
+        self.assertEqual(7, archive.restore(env, 0))
+        self.assertEqual([4, 7], env.actions)
+
+    def test_restore_loads_the_snapshot(self):
+        """Cells reached with an environment keep and load its snapshot."""
+
+        class Env:
+            unwrapped = property(lambda self: self)
+
+            def __init__(self, state):
+                self.state = state
+
+            def dump_state(self):
+                return self.state
+
+            def load_state(self, state):
+                self.state = state
+
+            def step(self, action):
+                raise AssertionError('restoring a snapshot does not step')
+
+        archive = CellArchive()
+        segments = [archive.start(), archive.start()]
+        archive.append(segments, [4, 5])
+        explorers = [Env('first'), Env('second')]
+        archive.update(segments, _records(room=[1, 2]), [0, 0], explorers)
+        self.assertEqual(['first', 'second'], archive.states[:2].tolist())
+        # a better trajectory without an environment drops the snapshot
+        segment = archive.start()
+        archive.update([segment], _records(room=[2]), [1])
+        self.assertIsNone(archive.states[1])
+
+        env = Env(None)
+        self.assertIsNone(archive.restore(env, 0))
+        self.assertEqual('first', env.state)
+        # the trajectory is kept for writing the cell to disk
+        self.assertEqual([4], archive.trajectory(0).tolist())
@@ -1,5 +1,7 @@
 """Test cases for the command line interface."""
 import io
+import os
+import tempfile
 from unittest import TestCase
 from unittest.mock import patch
 
@@ -7,7 +9,10 @@ import gymnasium as gym
 import numpy as np
 
 from gym_zelda_1._app import cli
+from gym_zelda_1._app import server
+from gym_zelda_1._registration import TASK_ENV_IDS
 from gym_zelda_1.actions import MOVEMENT
+from gym_zelda_1.demonstrations import read_demonstration
 
 
 class _DummyEnv(gym.Env):
@@ -51,6 +56,10 @@ class _DummyEnv(gym.Env):
         """Return a minimal keyboard mapping."""
         return {(): 0}
 
+    def episode_kwargs(self):
+        """Return the keyword arguments of an env without a task."""
+        return {}
+
 
 class CLITest(TestCase):
     """Tests for CLI parsing and playback dispatch."""
@@ -75,6 +84,16 @@ class CLITest(TestCase):
         self.assertEqual(2, raised.exception.code)
         self.assertIn('--steps must be positive in random mode', stderr.getvalue())
 
+    def test_task_ids_are_accepted(self):
+        """The player accepts every registered task ID and the server none."""
+        for env_id in TASK_ENV_IDS:
+            self.assertEqual(env_id, cli._get_args(['--env', env_id]).env)
+            # task episodes end per environment, which the server's pool
+            # cannot step past yet
+            with patch('sys.stderr', new=io.StringIO()):
+                with self.assertRaises(SystemExit):
+                    server._get_args(['--env', env_id])
+
     def test_random_no_render_does_not_request_human_render_mode(self):
         """Headless random playback does not construct a render window."""
         env = _DummyEnv()
@@ -138,3 +157,32 @@ class CLITest(TestCase):
             [' '.join(action) for action in MOVEMENT],
             env.get_action_meanings(),
         )
+
+    def test_record_writes_controller_bytes(self):
+        """Recording captures the seed and raw controller bytes per step."""
+        env = _DummyEnv()
+        env.ram = np.zeros(0x800, dtype=np.uint8)
+
+        def play(played_env, steps, **kwargs):
+            played_env.reset()
+            for action in range(steps):
+                played_env.step(action)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'play.zdemo')
+            with patch.object(cli.gym, 'make', return_value=env):
+                with patch.object(cli, 'play_random', side_effect=play):
+                    cli.main([
+                        '--mode', 'random',
+                        '--steps', '3',
+                        '--no-render',
+                        '--seed', '11',
+                        '--actionspace', 'movement',
+                        '--record', path,
+                    ])
+            episodes = read_demonstration(path)
+
+        self.assertEqual(1, len(episodes))
+        self.assertEqual(11, episodes[0]['seed'])
+        # MOVEMENT indices 0, 1, and 2 are NOOP, start, and A
+        self.assertEqual([0, 8, 1], episodes[0]['actions'].tolist())
@@ -0,0 +1,77 @@
+"""Test cases for the delta observation codec."""
+from unittest import TestCase
+import numpy as np
+from ..codec import FrameDecoder
+from ..codec import FrameEncoder
+from ..codec import frame_hash
+
+
+class FrameCodecTest(TestCase):
+    """Tests for exact round trips through the frame encoder and decoder."""
+
+    def _frames(self):
+        """Return a short stream of mostly identical NES-sized frames."""
+        rng = np.random.default_rng(0)
+        frame = rng.integers(0, 256, (240, 256, 3), dtype=np.uint8)
+        frames = [frame.copy(), frame.copy()]
+        frame[100:104, 40:50] = 7
+        frames.append(frame.copy())
+        frame[0:8, 0:8] += 1
+        frames.append(frame.copy())
+        frames.append(rng.integers(0, 256, (240, 256, 3), dtype=np.uint8))
+        return frames
+
+    def test_round_trip_is_exact(self):
+        """Decoded frames are byte-identical to the encoded frames."""
+        encoder = FrameEncoder()
+        decoder = FrameDecoder()
+        for frame in self._frames():
+            decoded = decoder.decode(encoder.encode(frame))
+            np.testing.assert_array_equal(frame, decoded)
+
+    def test_similar_frames_shrink(self):
+        """Repeated and lightly changed frames encode to a few bytes."""
+        encoder = FrameEncoder()
+        frames = self._frames()
+        sizes = [len(encoder.encode(frame)) for frame in frames]
+
+        self.assertGreater(sizes[0], frames[0].nbytes)
+        self.assertEqual(5, sizes[1])
+        self.assertLess(sizes[2], 2000)
+        self.assertLess(sizes[3], 400)
+        self.assertGreater(sizes[4], frames[4].nbytes)
+
+    def test_encoder_reuses_caller_buffers_safely(self):
+        """Encoding a buffer that is later mutated in place stays exact."""
+        encoder = FrameEncoder()
+        decoder = FrameDecoder()
+        screen = np.zeros((240, 256, 3), dtype=np.uint8)
+        for value in range(4):
+            screen[value * 8:(value + 1) * 8] = value + 1
+            decoded = decoder.decode(encoder.encode(screen))
+            np.testing.assert_array_equal(screen, decoded)
+
+    def test_irregular_shapes_fall_back_to_rows(self):
+        """Shapes that do not divide into tiles are diffed by rows."""
+        encoder = FrameEncoder()
+        decoder = FrameDecoder()
+        grid = np.zeros((11, 16), dtype=np.uint8)
+        decoder.decode(encoder.encode(grid))
+        grid[5, 3] = 9
+        decoded = decoder.decode(encoder.encode(grid))
+        np.testing.assert_array_equal(grid, decoded)
+
+    def test_decoder_requires_key_frame_and_checks_hash(self):
+        """Streams must start with a key frame and decode to their hash."""
+        frame = np.zeros((8, 8, 3), dtype=np.uint8)
+        encoder = FrameEncoder()
+        key = encoder.encode(frame)
+        repeat = encoder.encode(frame)
+        with self.assertRaises(ValueError):
+            FrameDecoder().decode(repeat)
+
+        corrupt = bytearray(key)
+        corrupt[-1] ^= 0xFF
+        with self.assertRaises(ValueError):
+            FrameDecoder().decode(bytes(corrupt))
+        self.assertEqual(frame_hash(frame), frame_hash(frame.copy()))
@@ -0,0 +1,120 @@
+"""Test cases for recording and converting demonstrations."""
+import os
+import tempfile
+from unittest import TestCase
+import numpy as np
+from ..demonstrations import DemonstrationRecorder
+from ..demonstrations import DemonstrationWriter
+from ..demonstrations import convert_demonstration
+from ..demonstrations import convert_demonstrations
+from ..demonstrations import read_demonstration
+from ..zelda_env import Zelda1Env
+
+
+# the actions of the recorded episodes: walk left, then swing the sword
+_ACTIONS = [0b01000000] * 25 + [0b00000001, 0] * 5
+
+
+class DemonstrationsTest(TestCase):
+    """Tests for the demonstration format, recorder, and converter."""
+
+    def setUp(self):
+        """Record two episodes into a temporary directory."""
+        self._directory = tempfile.TemporaryDirectory()
+        self.directory = self._directory.name
+        self.path = os.path.join(self.directory, 'play.zdemo')
+        env = Zelda1Env()
+        env = DemonstrationRecorder(env, self.path, checkpoint_interval=10)
+        self.observations = []
+        for seed in (3, None):
+            observation, _ = env.reset(seed=seed)
+            for action in _ACTIONS:
+                # nes-py returns a view of the screen that the step overwrites
+                self.observations.append(observation.copy())
+                observation, *_ = env.step(action)
+        env.close()
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        self._directory.cleanup()
+
+    def test_read_returns_episodes_and_checkpoints(self):
+        """Episodes hold their seed, actions, and periodic RAM."""
+        episodes = read_demonstration(self.path)
+        self.assertEqual([3, None], [episode['seed'] for episode in episodes])
+        for episode in episodes:
+            self.assertEqual({}, episode['env_kwargs'])
+            self.assertEqual(_ACTIONS, episode['actions'].tolist())
+            self.assertEqual([0, 10, 20, 30], sorted(episode['checkpoints']))
+            self.assertEqual((0x800,), episode['checkpoints'][10].shape)
+        # one byte per action plus the small record headers and checkpoints
+        self.assertLess(os.path.getsize(self.path), 2 * (35 + 4 * 0x805 + 64))
+
+    def test_convert_replays_observations_and_actions(self):
+        """Converted datasets pair each action with the prior observation."""
+        output = os.path.join(self.directory, 'dataset')
+        self.assertEqual(70, convert_demonstration(self.path, output))
+
+        observations = np.load(os.path.join(output, 'observations.npy'))
+        actions = np.load(os.path.join(output, 'actions.npy'))
+        episodes = np.load(os.path.join(output, 'episodes.npy'))
+        np.testing.assert_array_equal(np.stack(self.observations), observations)
+        self.assertEqual(_ACTIONS * 2, actions.tolist())
+        self.assertEqual([0, 35], episodes.tolist())
+
+    def test_convert_in_parallel_with_dict_observations(self):
+        """Worker processes convert files into one dataset per file."""
+        sizes = convert_demonstrations([self.path], self.directory,
+            obs_type='tiles', processes=2)
+        self.assertEqual([70], sizes)
+        path = os.path.join(self.directory, 'play', 'observations_tiles.npy')
+        tiles = np.load(path)
+        self.assertEqual((70, 11, 16), tiles.shape)
+
+    def test_convert_detects_divergent_replays(self):
+        """A checkpoint that does not match the replay is an error."""
+        path = os.path.join(self.directory, 'corrupt.zdemo')
+        writer = DemonstrationWriter(path, checkpoint_interval=2)
+        writer.reset(seed=0)
+        for action in (0, 0):
+            writer.step(action, np.zeros(0x800, dtype=np.uint8))
+        writer.close()
+        with self.assertRaises(ValueError):
+            convert_demonstration(path, os.path.join(self.directory, 'corrupt'))
+
+    def test_rejects_unknown_files(self):
+        """Files without the magic bytes are not demonstrations."""
+        path = os.path.join(self.directory, 'other.bin')
+        with open(path, 'wb') as other:
+            other.write(b'not a demonstration')
+        with self.assertRaises(ValueError):
+            read_demonstration(path)
+
+    def test_convert_replays_task_start_states(self):
+        """Task episodes replay from the start state of their task."""
+        path = os.path.join(self.directory, 'task.zdemo')
+        env = Zelda1Env(task='clear_room')
+        env = DemonstrationRecorder(env, path, checkpoint_interval=600)
+        observation, _ = env.reset(seed=0)
+        env.step(0)
+        env.close()
+        episode, = read_demonstration(path)
+        self.assertEqual(
+            dict(task='clear_room', task_params=dict(level=0, room=0x76)),
+            episode['env_kwargs'],
+        )
+
+        output = os.path.join(self.directory, 'task')
+        self.assertEqual(1, convert_demonstration(path, output))
+        observations = np.load(os.path.join(output, 'observations.npy'))
+        np.testing.assert_array_equal(observation, observations[0])
+
+    def test_convert_detects_wrong_start_states(self):
+        """The RAM after each reset is checked before the first action."""
+        path = os.path.join(self.directory, 'start.zdemo')
+        writer = DemonstrationWriter(path, checkpoint_interval=600)
+        writer.reset(seed=0, ram=np.zeros(0x800, dtype=np.uint8))
+        writer.step(0, np.zeros(0x800, dtype=np.uint8))
+        writer.close()
+        with self.assertRaises(ValueError):
+            convert_demonstration(path, os.path.join(self.directory, 'start'))
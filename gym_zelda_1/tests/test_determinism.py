@@ -0,0 +1,84 @@
+"""Test cases for the record and replay determinism harness."""
+import os
+import tempfile
+from unittest import TestCase
+import numpy as np
+from ..determinism import NO_DIVERGENCE
+from ..determinism import Recording
+from ..determinism import check
+from ..determinism import record
+from ..determinism import replay
+from ..zelda_env import Zelda1Env
+
+
+class DeterminismTest(TestCase):
+    """Tests for recording, replaying, and locating divergences."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Record one short episode that walks left and swings the sword."""
+        cls.env = Zelda1Env()
+        actions = np.array([0b01000000] * 30 + [0b00000001, 0] * 10)
+        cls.recording = record(actions, seed=5,
+            options=dict(noop_max=10, randomize_rng=True), env=cls.env)
+
+    @classmethod
+    def tearDownClass(cls):
+        """Close the shared environment."""
+        cls.env.close()
+
+    def test_replay_matches_recording(self):
+        """A replay of the same actions and seed reproduces every hash."""
+        self.assertEqual(50, len(self.recording))
+        self.assertEqual(51, len(self.recording.hashes))
+        self.assertEqual(NO_DIVERGENCE, replay(self.recording, env=self.env))
+
+    def test_replay_reports_first_divergent_step(self):
+        """A corrupted hash is reported at its step."""
+        hashes = self.recording.hashes.copy()
+        hashes[17] ^= 1
+        corrupt = Recording(self.recording.actions, hashes,
+            seed=self.recording.seed, options=self.recording.options)
+        self.assertEqual(17, replay(corrupt, env=self.env))
+
+        reseeded = Recording(self.recording.actions, self.recording.hashes,
+            seed=6, options=self.recording.options)
+        self.assertEqual(0, replay(reseeded, env=self.env))
+
+    def test_save_and_load_round_trip(self):
+        """Saved recordings load with their actions, hashes, and reset."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'episode.npz')
+            self.recording.save(path)
+            loaded = Recording.load(path)
+        np.testing.assert_array_equal(self.recording.actions, loaded.actions)
+        np.testing.assert_array_equal(self.recording.hashes, loaded.hashes)
+        self.assertEqual(5, loaded.seed)
+        self.assertEqual(self.recording.options, loaded.options)
+        self.assertEqual({}, loaded.env_kwargs)
+
+    def test_replay_rebuilds_the_recorded_env(self):
+        """Recordings keep the task and replay in an env built from it."""
+        actions = np.array([0b00010000] * 40)
+        recording = record(actions, seed=1, env_kwargs=dict(task='clear_room'))
+        self.assertEqual('clear_room', recording.env_kwargs['task'])
+        self.assertEqual(0x76, recording.env_kwargs['task_params']['room'])
+        self.assertEqual(NO_DIVERGENCE, replay(recording))
+        # the task starts in another room, so envs without it cannot replay
+        with self.assertRaises(ValueError):
+            replay(recording, env=self.env)
+        self.assertEqual([NO_DIVERGENCE], check([recording], 1).tolist())
+
+    def test_check_replays_in_parallel(self):
+        """Worker processes report the divergence of each recording."""
+        hashes = self.recording.hashes.copy()
+        hashes[-1] ^= 1
+        corrupt = Recording(self.recording.actions, hashes,
+            seed=self.recording.seed, options=self.recording.options)
+        divergences = check([self.recording, corrupt], processes=2)
+        self.assertEqual([NO_DIVERGENCE, 50], divergences.tolist())
+
+    def test_hashes_must_cover_every_step(self):
+        """Recordings need one hash per step plus the reset."""
+        with self.assertRaises(ValueError):
+            Recording([0, 0], [1, 2])
@@ -0,0 +1,66 @@
+"""Test cases for the batched policy evaluation harness."""
+import contextlib
+import io
+import json
+from unittest import TestCase
+import gymnasium as gym
+import numpy as np
+from .._app import cli
+from ..evaluation import evaluate
+from ..evaluation import load_policy
+from ..evaluation import summarize
+
+
+def walk_left(observations):
+    """Return the walk left controller byte for a batch of observations."""
+    return np.full(len(observations), 0b01000000, dtype=np.int64)
+
+
+def _make_env():
+    """Build a short evaluation environment."""
+    return gym.make('Zelda1-v0', max_episode_steps=100)
+
+
+class EvaluationTest(TestCase):
+    """Tests for loading and evaluating policies."""
+
+    def test_load_policy_from_entry_point(self):
+        """Policies load from "module:callable" strings."""
+        policy = load_policy(f'{__name__}:walk_left')
+        self.assertIs(walk_left, policy)
+        with self.assertRaises(ValueError):
+            load_policy(__name__)
+        with self.assertRaises(TypeError):
+            load_policy(f'{__name__}:__doc__')
+
+    def test_evaluate_reports_episode_stats(self):
+        """Each completed episode reports its rooms, deaths, and length."""
+        results = evaluate(walk_left, [_make_env] * 2, episodes=3, seed=0)
+
+        self.assertEqual(3, len(results))
+        for result in results:
+            self.assertEqual(100, result['steps'])
+            # leaving the start screen skips the frames of the scroll
+            self.assertLess(100, result['frames'])
+            # walking left for 100 steps leaves the start screen
+            self.assertEqual(2, result['rooms'])
+            self.assertEqual(0, result['deaths'])
+        summary = summarize(results)
+        self.assertEqual(2.0, summary['rooms']['mean'])
+        self.assertEqual(100, summary['steps']['max'])
+
+    def test_cli_evaluate_prints_json(self):
+        """The evaluate mode prints the summary and episodes as JSON."""
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            result = cli.main([
+                '--mode', 'evaluate',
+                '--policy', f'{__name__}:walk_left',
+                '--episodes', '2',
+                '--num-envs', '2',
+                '--steps', '10',
+            ])
+        self.assertEqual(0, result)
+        report = json.loads(stdout.getvalue())
+        self.assertEqual(2, len(report['episodes']))
+        self.assertEqual(10, report['summary']['steps']['mean'])
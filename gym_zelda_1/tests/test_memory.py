@@ -0,0 +1,66 @@
+"""Test cases for memory accounting and the low memory mode."""
+import tempfile
+from unittest import TestCase
+import numpy as np
+from ..memory import memory_usage
+from ..memory import rss_per_env
+from ..video import VideoRecorder
+from ..zelda_env import Zelda1Env
+
+
+# the bytes of one RGB frame
+_FRAME_BYTES = 240 * 256 * 3
+
+
+class MemoryTest(TestCase):
+    """Tests for memory_usage, rss_per_env, and low_memory."""
+
+    def test_reports_emulator_and_python_buffers(self):
+        """The usage splits the ROM, emulator buffers, and Python arrays."""
+        env = Zelda1Env()
+        env.reset(seed=0)
+        env.step(0)
+        usage = memory_usage(env)
+        emulator = env.screen.nbytes + env.ram.nbytes
+        emulator += sum(controller.nbytes for controller in env.controllers)
+        env.close()
+
+        self.assertEqual(
+            {'rom', 'emulator', 'buffers', 'wrappers', 'total'}, set(usage))
+        self.assertEqual(0x20010, usage['rom'])
+        self.assertEqual(emulator, usage['emulator'])
+        # the environment keeps only small arrays, such as its events
+        self.assertLess(usage['buffers'], _FRAME_BYTES)
+        self.assertEqual(0, usage['wrappers'])
+        self.assertEqual(
+            usage['total'],
+            sum(value for key, value in usage.items() if key != 'total'),
+        )
+
+    def test_low_memory_returns_compact_copies(self):
+        """Low memory mode copies the window instead of viewing the screen."""
+        env = Zelda1Env(obs_type='roi', low_memory=True,
+            render_mode='rgb_array')
+        observation, _ = env.reset(seed=0)
+        self.assertIsNone(observation.base)
+        observation, *_ = env.step(0)
+        self.assertIsNone(observation.base)
+        self.assertFalse(np.shares_memory(observation, env.screen))
+        self.assertEqual((240, 256, 3), env.render().shape)
+        env.close()
+
+    def test_counts_wrapper_buffers(self):
+        """Arrays held by wrappers are charged to the wrappers."""
+        with tempfile.TemporaryDirectory() as directory:
+            env = VideoRecorder(Zelda1Env(), directory, capacity=4,
+                episode_trigger=lambda episode: True)
+            env.reset(seed=0)
+            usage = memory_usage(env)
+            env.close()
+        self.assertEqual(4 * _FRAME_BYTES, usage['wrappers'])
+
+    def test_rss_per_env(self):
+        """The resident growth per environment is measured in bytes."""
+        self.assertIsInstance(rss_per_env(2, steps=1, obs_type='tiles'), float)
+        with self.assertRaises(ValueError):
+            rss_per_env(0)
@@ -0,0 +1,131 @@
+"""Test cases for the room adjacency graph."""
+import os
+import tempfile
+from unittest import TestCase
+import numpy as np
+from ..navigation import BOMBABLE
+from ..navigation import LOCKED
+from ..navigation import NUM_ROOMS
+from ..navigation import OPEN
+from ..navigation import UNREACHABLE
+from ..navigation import WALL
+from ..navigation import RoomGraph
+from .._app import rooms
+
+
+# the shape of the edges of a graph (levels, rooms, exits)
+_EDGES_SHAPE = (10, NUM_ROOMS, 4)
+
+
+class RoomGraphTest(TestCase):
+    """Tests for the room graph and its precomputed distances."""
+
+    def test_default_overworld_edges_follow_the_map(self):
+        """Overworld edges are the walkable screen edges of the map."""
+        graph = RoomGraph.default()
+
+        self.assertEqual((10, NUM_ROOMS, NUM_ROOMS), graph.distances.shape)
+        self.assertEqual(np.uint8, graph.distances.dtype)
+        # the start screen opens north, east, and west, but not south
+        self.assertEqual(
+            [OPEN, WALL, OPEN, OPEN], graph.edges[0, 0x77].tolist())
+        self.assertEqual(0, graph.distance(0, 0x77, 0x77))
+        self.assertEqual(1, graph.distance(0, 0x77, 0x67))
+        self.assertEqual(1, graph.distance(0, 0x77, 0x76))
+        # the first dungeon is on an island reached by the bridge to the east
+        self.assertEqual(WALL, graph.edges[0, 0x37, 1])
+        self.assertEqual(OPEN, graph.edges[0, 0x37, 2])
+        self.assertEqual(OPEN, graph.edges[0, 0x38, 3])
+        self.assertEqual(6, graph.distance(0, 0x77, 0x37))
+        # all but three screens are reachable on foot from the start
+        unreachable = graph.distance_to_goal(0, 0x77) == UNREACHABLE
+        self.assertEqual(
+            [0x0F, 0x2F, 0x45], np.flatnonzero(unreachable).tolist())
+        # walls make paths longer than the hops between grid cells
+        self.assertLess(7 + 7, graph.distance(0, 0x77, 0x00))
+        self.assertNotEqual(UNREACHABLE, graph.distance(0, 0x77, 0x00))
+        # rows do not wrap around the edges of the grid
+        self.assertEqual(WALL, graph.edges[0, 0x0F, 2])
+        self.assertEqual(WALL, graph.edges[0, 0x10, 3])
+
+    def test_default_dungeon_doors_follow_the_rom(self):
+        """Dungeon edges are the walls and doors of the first quest."""
+        graph = RoomGraph.default()
+        # the entrance of level 1 opens east and west to a locked door north
+        self.assertEqual(
+            [LOCKED, WALL, OPEN, OPEN], graph.edges[1, 0x73].tolist())
+        self.assertEqual(LOCKED, graph.edges[1, 0x63, 1])
+        self.assertEqual(BOMBABLE, graph.edges[1, 0x53, 0])
+        self.assertEqual(BOMBABLE, graph.edges[1, 0x43, 1])
+        # the rooms of other levels in the same level block have no edges
+        self.assertFalse(graph.edges[1, 0x7D].any())
+        self.assertTrue(graph.edges[2, 0x7D].any())
+        # the boss of level 1 is behind locked doors
+        self.assertEqual(UNREACHABLE, graph.distance(1, 0x73, 0x35))
+        keys = RoomGraph.default(passable=(OPEN, LOCKED))
+        self.assertEqual(8, keys.distance(1, 0x73, 0x35))
+        everything = RoomGraph.default(passable=(OPEN, LOCKED, BOMBABLE))
+        self.assertEqual(6, everything.distance(1, 0x73, 0x35))
+
+    def test_default_graph_is_generated_from_the_rom_and_map(self):
+        """The packaged edges are the ones the room generator writes."""
+        graph = RoomGraph.default()
+        np.testing.assert_array_equal(graph.edges[0], rooms.overworld_edges())
+        np.testing.assert_array_equal(graph.edges[1:], rooms.underworld_edges())
+
+    def test_dungeon_rooms_are_connected_by_observation(self):
+        """Observed transitions add symmetric edges to dungeon levels."""
+        graph = RoomGraph(np.zeros(_EDGES_SHAPE))
+        self.assertEqual(UNREACHABLE, graph.distance(1, 0x73, 0x63))
+
+        self.assertTrue(graph.observe(1, 0x73, 0x63))
+        self.assertTrue(graph.observe(1, 0x63, 0x64))
+        self.assertFalse(graph.observe(1, 0x63, 0x73))
+        self.assertFalse(graph.observe(1, 0x73, 0x10))
+
+        self.assertEqual(2, graph.distance(1, 0x73, 0x64))
+        self.assertEqual(2, graph.distance(1, 0x64, 0x73))
+        goal = graph.distance_to_goal(1, 0x64)
+        self.assertEqual([2, 1, 0], goal[[0x73, 0x63, 0x64]].tolist())
+
+    def test_passable_edge_types(self):
+        """Locked and bombable edges are only used when passable."""
+        graph = RoomGraph(np.zeros(_EDGES_SHAPE))
+        graph.observe(2, 0x10, 0x11, edge=LOCKED)
+        graph.observe(2, 0x11, 0x12, edge=BOMBABLE)
+        self.assertEqual(UNREACHABLE, graph.distance(2, 0x10, 0x11))
+
+        keys = RoomGraph(graph.edges, passable=(OPEN, LOCKED))
+        self.assertEqual(1, keys.distance(2, 0x10, 0x11))
+        self.assertEqual(UNREACHABLE, keys.distance(2, 0x10, 0x12))
+
+        everything = RoomGraph(graph.edges, passable=(OPEN, LOCKED, BOMBABLE))
+        self.assertEqual(2, everything.distance(2, 0x10, 0x12))
+
+    def test_vectorized_lookups(self):
+        """Distances can be looked up for a batch of rooms at once."""
+        graph = RoomGraph.default()
+        levels = np.zeros(3, dtype=np.uint8)
+        rooms = np.array([0x77, 0x76, 0x00])
+        goals = np.array([0x77, 0x77, 0x01])
+        self.assertEqual([0, 1, 1], graph.distance(levels, rooms, goals).tolist())
+
+    def test_save_and_load_round_trip(self):
+        """Saved graphs load with their precomputed distances."""
+        graph = RoomGraph.default()
+        graph.observe(3, 0x20, 0x21)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'rooms.npz')
+            graph.save(path)
+            loaded = RoomGraph.load(path)
+            np.testing.assert_array_equal(graph.edges, loaded.edges)
+            self.assertIsNotNone(loaded._distances)
+            np.testing.assert_array_equal(graph.distances, loaded.distances)
+
+            keys = RoomGraph.load(path, passable=(OPEN, LOCKED))
+            self.assertIsNone(keys._distances)
+
+    def test_rejects_misshapen_edges(self):
+        """Edges must cover every exit of every room of every level."""
+        with self.assertRaises(ValueError):
+            RoomGraph(np.zeros((1, NUM_ROOMS, 4)))
@@ -0,0 +1,204 @@
+"""Test cases for the remote environment server and client."""
+import asyncio
+import os
+import socket
+import tempfile
+from unittest import TestCase
+from unittest import skipUnless
+
+import gymnasium as gym
+import numpy as np
+
+from ..remote import EnvClient
+from ..remote import EnvServer
+from ..zelda_env import INFO_RECORD_DTYPE
+
+
+class _DummyEnv(gym.Env):
+    """Minimal environment that encodes its last action in observations."""
+
+    observation_space = gym.spaces.Box(
+        low=0,
+        high=255,
+        shape=(4, 4, 3),
+        dtype=np.uint8,
+    )
+    action_space = gym.spaces.Discrete(256)
+
+    def __init__(self):
+        """Initialize the dummy environment."""
+        super().__init__()
+        self.closed = False
+        self.frames = 0
+
+    def reset(self, *, seed=None, options=None):
+        """Return an observation filled with the seed (or zero)."""
+        super().reset(seed=seed)
+        self.frames = 0
+        fill = 0 if seed is None else seed
+        return np.full(self.observation_space.shape, fill, np.uint8), {}
+
+    def step(self, action):
+        """Return an observation filled with the action."""
+        self.frames += 1
+        observation = np.full(self.observation_space.shape, action, np.uint8)
+        return observation, float(action), action == 255, False, {}
+
+    def close(self):
+        """Record that the environment was closed."""
+        self.closed = True
+
+    def info_record(self):
+        """Return an info record holding the frame count."""
+        record = np.zeros((), dtype=INFO_RECORD_DTYPE)
+        record['rupees'] = self.frames
+        return record
+
+
+class _DictEnv(_DummyEnv):
+    """A dummy environment with compact dictionary observations."""
+
+    observation_space = gym.spaces.Dict({
+        'tiles': gym.spaces.Box(0, 255, (2, 3), np.uint8),
+        'objects': gym.spaces.Box(0, 255, (4,), np.uint8),
+    })
+
+    def reset(self, *, seed=None, options=None):
+        """Return tiles filled with the seed (or zero)."""
+        gym.Env.reset(self, seed=seed)
+        return self._observation(0 if seed is None else seed), {}
+
+    def step(self, action):
+        """Return tiles filled with the action."""
+        return self._observation(action), float(action), False, False, {}
+
+    def _observation(self, fill):
+        """Return a dictionary observation filled with a value."""
+        return dict(
+            tiles=np.full((2, 3), fill, np.uint8),
+            objects=np.full(4, 255 - fill, np.uint8),
+        )
+
+
+class EnvServerTest(TestCase):
+    """Tests for batched stepping through the asyncio protocol."""
+
+    async def _roundtrip(self, **address):
+        """Connect two clients, step them, and check their results."""
+        first = await EnvClient.connect(num_envs=2, **address)
+        second = await EnvClient.connect(num_envs=1, **address)
+        try:
+            observations, infos = await first.reset(seeds=[3, None])
+            self.assertEqual((2, 4, 4, 3), observations.shape)
+            self.assertEqual([3, 0], observations[:, 0, 0, 0].tolist())
+            self.assertEqual([0, 0], infos['rupees'].tolist())
+
+            result = await first.step([7, 255])
+            observations, rewards, terminated, truncated, infos = result
+            self.assertEqual([7, 255], observations[:, 0, 0, 0].tolist())
+            self.assertEqual([7.0, 255.0], rewards.tolist())
+            self.assertEqual([False, True], terminated.tolist())
+            self.assertEqual([False, False], truncated.tolist())
+            self.assertEqual([1, 1], infos['rupees'].tolist())
+
+            result = await second.step([9])
+            self.assertEqual([9], result[0][:, 0, 0, 0].tolist())
+            with self.assertRaises(RuntimeError):
+                await EnvClient.connect(num_envs=1, **address)
+        finally:
+            await first.close()
+            await second.close()
+
+    def test_tcp_batched_reset_and_step(self):
+        """Clients lease disjoint environments and step them in batches."""
+        async def run():
+            server = EnvServer(_DummyEnv, 3)
+            await server.start(port=0)
+            try:
+                _, port = server.address[:2]
+                await self._roundtrip(port=port)
+                # closed clients return their environments to the pool
+                client = await EnvClient.connect(num_envs=3, port=port)
+                await client.close()
+            finally:
+                await server.close()
+            self.assertTrue(all(env.closed for env in server.envs))
+
+        asyncio.run(run())
+
+    @skipUnless(hasattr(socket, 'AF_UNIX'), 'requires Unix domain sockets')
+    def test_unix_socket_batched_reset_and_step(self):
+        """The protocol also runs over a Unix domain socket."""
+        async def run():
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, 'zelda.sock')
+                server = EnvServer(_DummyEnv, 3)
+                await server.start(path=path)
+                try:
+                    await self._roundtrip(path=path)
+                finally:
+                    await server.close()
+
+        asyncio.run(run())
+
+    def test_delta_encoded_observations(self):
+        """Delta encoded observations decode to the hosted observations."""
+        async def run():
+            server = EnvServer(_DummyEnv, 2)
+            await server.start(port=0)
+            try:
+                client = await EnvClient.connect(
+                    num_envs=2, port=server.address[1], delta=True)
+                observations, _ = await client.reset(seeds=[1, 2])
+                self.assertEqual([1, 2], observations[:, 0, 0, 0].tolist())
+                for actions in ([4, 5], [4, 6]):
+                    observations, rewards, *_ = await client.step(actions)
+                    self.assertEqual((2, 4, 4, 3), observations.shape)
+                    self.assertTrue(np.all(observations[0] == actions[0]))
+                    self.assertTrue(np.all(observations[1] == actions[1]))
+                    self.assertEqual(actions, rewards.tolist())
+                await client.close()
+            finally:
+                await server.close()
+
+        asyncio.run(run())
+
+    def test_step_rejects_wrong_batch_size(self):
+        """Clients validate the number of actions before sending."""
+        async def run():
+            server = EnvServer(_DummyEnv, 1)
+            await server.start(port=0)
+            try:
+                client = await EnvClient.connect(port=server.address[1])
+                with self.assertRaises(ValueError):
+                    await client.step([1, 2])
+                await client.close()
+            finally:
+                await server.close()
+
+        asyncio.run(run())
+
+    def test_dict_observations_are_records(self):
+        """Dict observations arrive as records with one field per key."""
+        async def run():
+            server = EnvServer(_DictEnv, 2)
+            await server.start(port=0)
+            try:
+                client = await EnvClient.connect(
+                    num_envs=2, port=server.address[1])
+                observations, _ = await client.reset(seeds=[1, 2])
+                self.assertEqual((2,), observations.shape)
+                self.assertEqual((2, 2, 3), observations['tiles'].shape)
+                tiles = observations['tiles']
+                self.assertEqual([1, 2], tiles[:, 0, 0].tolist())
+                observations, *_ = await client.step([5, 6])
+                self.assertEqual(
+                    [250, 249], observations['objects'][:, 3].tolist())
+                await client.close()
+                # delta encoding compares image frames only
+                with self.assertRaises(RuntimeError):
+                    await EnvClient.connect(port=server.address[1], delta=True)
+            finally:
+                await server.close()
+
+        asyncio.run(run())
@@ -0,0 +1,130 @@
+"""Test cases for the memory-mapped replay buffer."""
+import tempfile
+from unittest import TestCase
+from gymnasium import spaces
+import numpy as np
+from ..replay import ReplayBuffer
+from ..zelda_env import INFO_RECORD_DTYPE
+
+
+# a small frame space that stands in for the NES screen
+_SPACE = spaces.Box(0, 255, (4, 4, 3), np.uint8)
+
+
+def _frame(value):
+    """Return a frame filled with a value."""
+    return np.full(_SPACE.shape, value, dtype=np.uint8)
+
+
+def _info(value):
+    """Return an info record with a value in its rupees field."""
+    record = np.zeros((), dtype=INFO_RECORD_DTYPE)
+    record['rupees'] = value
+    return record
+
+
+class ReplayBufferTest(TestCase):
+    """Tests for appending, sampling, and stacking transitions."""
+
+    def setUp(self):
+        """Create a temporary directory for the buffer files."""
+        self._directory = tempfile.TemporaryDirectory()
+        self.directory = self._directory.name
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        self._directory.cleanup()
+
+    def _fill(self, buffer, episodes):
+        """Append episodes of frames numbered by the slot they are written to."""
+        value = -1
+        for length in episodes:
+            value += 1
+            buffer.reset(_frame(value), _info(value))
+            for _ in range(length):
+                value += 1
+                frame, info = _frame(value), _info(value)
+                buffer.append(value % 20, 1.0, False, False, frame, info)
+        return value
+
+    def test_transitions_reference_the_next_slot(self):
+        """Sampled next observations are the observations that followed."""
+        buffer = ReplayBuffer(self.directory, 64, _SPACE)
+        self._fill(buffer, [5, 7])
+        batch = buffer.sample(256, rng=np.random.default_rng(0))
+
+        current = batch['observations'][:, -1, 0, 0, 0]
+        following = batch['next_observations'][:, -1, 0, 0, 0]
+        np.testing.assert_array_equal(current + 1, following)
+        np.testing.assert_array_equal(current, batch['infos']['rupees'])
+        np.testing.assert_array_equal(following, batch['next_infos']['rupees'])
+        np.testing.assert_array_equal(following % 20, batch['actions'])
+        # the last observation of an episode begins no transition
+        self.assertNotIn(5, current)
+        self.assertNotIn(13, current)
+
+    def test_frame_stacks_stop_at_episode_starts(self):
+        """Frame stacks repeat the first frame instead of crossing episodes."""
+        buffer = ReplayBuffer(self.directory, 64, _SPACE)
+        self._fill(buffer, [5, 7])
+        slots = buffer.stack_indices(np.array([0, 2, 6, 8]), 4)
+        np.testing.assert_array_equal([
+            [0, 0, 0, 0],
+            [0, 0, 1, 2],
+            [6, 6, 6, 6],
+            [6, 6, 7, 8],
+        ], slots)
+
+        batch = buffer.sample(64, stack=4, rng=np.random.default_rng(1))
+        self.assertEqual((64, 4, 4, 4, 3), batch['observations'].shape)
+        np.testing.assert_array_equal(
+            batch['observations'][:, 1:],
+            batch['next_observations'][:, :-1],
+        )
+
+    def test_ring_buffer_wraps_without_stale_stacks(self):
+        """Wrapped buffers never stack frames that were overwritten."""
+        buffer = ReplayBuffer(self.directory, 8, _SPACE)
+        last = self._fill(buffer, [20])
+        self.assertEqual(8, len(buffer))
+        batch = buffer.sample(128, stack=3, rng=np.random.default_rng(2))
+        frames = batch['observations'][:, :, 0, 0, 0].astype(int)
+        self.assertTrue(np.all(frames >= last - 7))
+        self.assertTrue(np.all(np.diff(frames, axis=1) >= 0))
+
+    def test_reopen_from_disk(self):
+        """Flushed buffers reopen with their data and write position."""
+        buffer = ReplayBuffer(self.directory, 16, _SPACE)
+        self._fill(buffer, [3])
+        buffer.flush()
+        del buffer
+
+        reopened = ReplayBuffer(self.directory)
+        self.assertEqual(16, reopened.capacity)
+        self.assertEqual(4, len(reopened))
+        reopened.append(9, 0.5, True, False, _frame(4), _info(4))
+        np.testing.assert_array_equal(_frame(4), reopened.observations[4])
+        self.assertTrue(reopened.terminated[3])
+
+    def test_dict_observations_use_structured_storage(self):
+        """Dictionary observations are stored as structured records."""
+        space = spaces.Dict({
+            'tiles': spaces.Box(0, 255, (11, 16), np.uint8),
+            'objects': spaces.Box(0, 255, (20, 5), np.uint8),
+        })
+        buffer = ReplayBuffer(self.directory, 4, space)
+        observation = {
+            'tiles': np.full((11, 16), 3, np.uint8),
+            'objects': np.full((20, 5), 4, np.uint8),
+        }
+        buffer.reset(observation, _info(0))
+        buffer.append(1, 0.0, False, False, observation, _info(1))
+        batch = buffer.sample(2, rng=np.random.default_rng(0))
+        self.assertTrue(np.all(batch['observations']['tiles'] == 3))
+        self.assertTrue(np.all(batch['next_observations']['objects'] == 4))
+
+    def test_append_requires_reset(self):
+        """The first observation of an episode must come from reset."""
+        buffer = ReplayBuffer(self.directory, 4, _SPACE)
+        with self.assertRaises(ValueError):
+            buffer.append(0, 0.0, False, False, _frame(1), _info(1))
@@ -0,0 +1,108 @@
+"""Test cases for the goal-conditioned task suite."""
+from unittest import TestCase
+import gymnasium as gym
+import numpy as np
+from ..tasks import Task
+from ..tasks import room_cleared
+from ..vector import ThreadedZelda1Env
+from ..zelda_env import INFO_RECORD_DTYPE
+from ..zelda_env import Zelda1Env
+
+
+# the controller byte that walks Link north, out of the start screen
+_UP = 0b00010000
+
+
+class TaskTest(TestCase):
+    """Tests for the task predicates and the Task class."""
+
+    def test_predicates_are_vectorized(self):
+        """Predicates check a batch of records in one call."""
+        records = np.zeros(3, dtype=INFO_RECORD_DTYPE)
+        objects = np.zeros((3, 20, 5), dtype=np.uint8)
+        records['room'] = [0x76, 0x76, 0x77]
+        records['killed_enemies'] = [1, 1, 1]
+        objects[1, 2, 0] = 14
+        np.testing.assert_array_equal(
+            [True, False, False],
+            room_cleared(records, objects, level=0, room=0x76),
+        )
+        task = Task('rupees', count=3)
+        records['rupees'] = [0, 3, 9]
+        np.testing.assert_array_equal(
+            [False, True, True], task.success(records, objects))
+
+    def test_rejects_unknown_tasks_and_parameters(self):
+        """Tasks and their parameters are validated."""
+        with self.assertRaises(ValueError):
+            Task('defeat_ganon')
+        with self.assertRaises(TypeError):
+            Task('get_sword', room=0x77)
+        with self.assertRaises(ValueError):
+            Zelda1Env(task='defeat_ganon')
+
+
+class TaskEnvTest(TestCase):
+    """Tests for task rewards, termination, and start states."""
+
+    def test_reach_room_rewards_and_terminates(self):
+        """Completing the task gives a reward of 1 and ends the episode."""
+        env = Zelda1Env(task='reach_room')
+        env.reset(seed=0)
+        rewards = []
+        for _ in range(200):
+            _, reward, terminated, _, info = env.step(_UP)
+            rewards.append(reward)
+            if terminated:
+                break
+        env.close()
+        self.assertTrue(terminated)
+        self.assertEqual(0x67, info['room'])
+        self.assertEqual(1.0, sum(rewards))
+        self.assertEqual(1.0, rewards[-1])
+
+    def test_task_params_override_defaults(self):
+        """Parameters change the goal of a task."""
+        env = Zelda1Env(task='rupees', task_params=dict(count=2))
+        env.reset(seed=0)
+        env.ram[0x066D] = 1
+        self.assertFalse(env.step(0)[2])
+        env.ram[0x066D] = 2
+        self.assertTrue(env.step(0)[2])
+        # resets start a new, incomplete episode
+        env.ram[0x066D] = 0
+        env.reset(seed=0)
+        self.assertFalse(env.step(0)[2])
+        env.close()
+
+    def test_clear_room_starts_in_its_room(self):
+        """Every reset walks to the start state of the task."""
+        env = Zelda1Env(task='clear_room')
+        for seed in (0, 1):
+            _, info = env.reset(seed=seed)
+            self.assertEqual(0x76, info['room'])
+            _, reward, terminated, _, _ = env.step(0)
+            self.assertEqual(0.0, reward)
+            self.assertFalse(terminated)
+        env.close()
+
+    def test_threaded_batches_check_tasks(self):
+        """Threaded batches check the task over the whole batch."""
+        envs = ThreadedZelda1Env(2, task='reach_room')
+        envs.reset(seed=0)
+        for _ in range(200):
+            _, rewards, terminated, _, records = envs.step(
+                np.array([_UP, 0]))
+            if terminated.any():
+                break
+        envs.close()
+        np.testing.assert_array_equal([True, False], terminated)
+        np.testing.assert_array_equal([1.0, 0.0], rewards)
+        self.assertEqual(0x67, records['room'][0])
+
+    def test_registered_task_ids(self):
+        """Each task has a registered ID with a time limit."""
+        env = gym.make('Zelda1GetSword-v0')
+        self.assertEqual('get_sword', env.unwrapped.task.name)
+        self.assertEqual(5000, env.spec.max_episode_steps)
+        env.close()
@@ -0,0 +1,105 @@
+"""Test cases for the threaded batch of environments."""
+from unittest import TestCase
+import numpy as np
+from ..actions import MOVEMENT
+from ..vector import ThreadedZelda1Env
+from ..zelda_env import ROOM_ENTERED
+from ..zelda_env import Zelda1Env
+
+
+# the controller bytes that walk Link north and west
+_UP = 0b00010000
+_LEFT = 0b01000000
+
+
+class ThreadedZelda1EnvTest(TestCase):
+    """Tests for stepping a batch of emulators on a thread pool."""
+
+    def test_batch_matches_individual_environments(self):
+        """A batch steps exactly like independent environments."""
+        batch = ThreadedZelda1Env(2, actions=MOVEMENT)
+        single = Zelda1Env()
+        try:
+            observations, records = batch.reset(seed=0)
+            observation, _ = single.reset(seed=0)
+            self.assertEqual((2, 240, 256, 3), observations.shape)
+            self.assertEqual((2,), records.shape)
+            np.testing.assert_array_equal(observation, observations[1])
+            # walk left in the first environment and right in the second
+            for _ in range(20):
+                transition = batch.step(np.array([8, 4]))
+                observation, *_ = single.step(0b10000000)
+            observations, rewards, terminated, truncated, records = transition
+            np.testing.assert_array_equal(observation, observations[1])
+            self.assertEqual(single.info_record(), records[1])
+            self.assertLess(records['x_pos'][0], records['x_pos'][1])
+            self.assertEqual([0, 0], rewards.tolist())
+            self.assertFalse(terminated.any() or truncated.any())
+        finally:
+            batch.close()
+            single.close()
+
+    def test_tiles_observations_are_batched(self):
+        """Dict observations are stacked key by key."""
+        batch = ThreadedZelda1Env(2, obs_type='tiles')
+        try:
+            observations, _ = batch.reset()
+            self.assertEqual((2, 11, 16), observations['tiles'].shape)
+            self.assertIn(observations, batch.observation_space)
+            observations, *_ = batch.step([0, 0])
+            self.assertEqual((2, 20, 5), observations['objects'].shape)
+            with self.assertRaises(ValueError):
+                batch.step([0])
+        finally:
+            batch.close()
+
+    def test_reset_mask_resets_finished_environments(self):
+        """Masked resets restart finished episodes and keep the others."""
+        batch = ThreadedZelda1Env(2, task='reach_room')
+        try:
+            batch.reset(seed=0)
+            for _ in range(200):
+                _, _, terminated, truncated, records = batch.step([_UP, _LEFT])
+                if terminated.any():
+                    break
+            np.testing.assert_array_equal([True, False], terminated)
+            x_pos = records['x_pos'][1]
+            with self.assertRaises(ValueError):
+                batch.step([0, 0])
+            with self.assertRaises(ValueError):
+                batch.reset(mask=[True])
+            _, records = batch.reset(seed=0, mask=terminated | truncated)
+            self.assertEqual(0x77, records['room'][0])
+            self.assertEqual(x_pos, records['x_pos'][1])
+            _, _, terminated, *_ = batch.step([0, 0])
+            self.assertFalse(terminated.any())
+        finally:
+            batch.close()
+
+    def test_steps_finish_like_zelda1env(self):
+        """Batched steps report events and refresh the rendered frame."""
+        batch = ThreadedZelda1Env(1, render_mode='rgb_array')
+        try:
+            batch.reset(seed=0)
+            entered = False
+            for _ in range(200):
+                observations, *_ = batch.step([_LEFT])
+                entered |= ROOM_ENTERED in batch.events[0, :, 0]
+            self.assertTrue(entered)
+            np.testing.assert_array_equal(
+                observations[0], batch.envs[0].render())
+        finally:
+            batch.close()
+
+    def test_low_memory_batches_compact_observations(self):
+        """Low memory environments batch compact copies of their windows."""
+        batch = ThreadedZelda1Env(2, obs_type='roi', low_memory=True)
+        try:
+            batch.reset(seed=0)
+            observations, *_ = batch.step([_LEFT, _UP])
+            self.assertEqual((2, 64, 64, 3), observations.shape)
+            for observation, env in zip(observations, batch.envs):
+                np.testing.assert_array_equal(
+                    env._get_observation(env.screen), observation)
+        finally:
+            batch.close()
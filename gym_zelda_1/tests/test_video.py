@@ -0,0 +1,129 @@
+"""Test cases for the triggered video recorder."""
+import os
+import tempfile
+from unittest import TestCase
+import numpy as np
+from ..video import VideoRecorder
+from ..zelda_env import ROOM_ENTERED
+from ..zelda_env import Zelda1Env
+
+
+# the controller byte that walks Link left, off of the start screen
+_LEFT = 0b01000000
+
+
+# the controller byte that walks Link right, back onto the start screen
+_RIGHT = 0b10000000
+
+
+class VideoRecorderTest(TestCase):
+    """Tests for recording episodes and event clips."""
+
+    def setUp(self):
+        """Create a temporary directory for the clips."""
+        self._directory = tempfile.TemporaryDirectory()
+        self.directory = self._directory.name
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        self._directory.cleanup()
+
+    def _clips(self):
+        """Return the sorted names of the encoded clips."""
+        return sorted(os.listdir(self.directory))
+
+    def test_rejects_bad_arguments(self):
+        """Unknown formats and empty buffers are errors."""
+        env = Zelda1Env()
+        with self.assertRaises(ValueError):
+            VideoRecorder(env, self.directory, video_format='avi')
+        with self.assertRaises(ValueError):
+            VideoRecorder(env, self.directory, capacity=0)
+        env.close()
+
+    def test_records_triggered_episodes(self):
+        """Triggered episodes are encoded in order, the rest are skipped."""
+        env = VideoRecorder(Zelda1Env(), self.directory, capacity=8,
+            episode_trigger=lambda episode: episode % 2 == 0)
+        screens = []
+        for _ in range(3):
+            env.reset(seed=0)
+            for _ in range(10):
+                env.step(_LEFT)
+                screens.append(env.unwrapped.screen.copy())
+        env.close()
+
+        self.assertEqual(
+            ['episode-000000-00000010.npz', 'episode-000002-00000010.npz'],
+            self._clips(),
+        )
+        path = os.path.join(self.directory, self._clips()[1])
+        with np.load(path) as clip:
+            frames = clip['frames']
+        # the ring buffer keeps the last capacity frames of the episode
+        self.assertEqual((8, 240, 256, 3), frames.shape)
+        np.testing.assert_array_equal(np.stack(screens[-8:]), frames)
+
+    def test_records_clips_around_events(self):
+        """Events start a clip that ends post_frames steps later."""
+        env = VideoRecorder(Zelda1Env(), self.directory, capacity=16,
+            event_types=[ROOM_ENTERED], post_frames=4)
+        env.reset(seed=0)
+        entered = None
+        for step in range(1, 200):
+            _, _, _, _, info = env.step(_LEFT)
+            if entered is None and ROOM_ENTERED in info['events'][:, 0]:
+                entered = step
+        env.close()
+
+        self.assertIsNotNone(entered)
+        self.assertEqual(
+            [f'event-000000-{entered + 4:08d}.npz'],
+            self._clips()[:1],
+        )
+
+    def test_repeated_events_extend_the_clip(self):
+        """Events during a clip extend it, and the next clip starts fresh."""
+        env = VideoRecorder(Zelda1Env(), self.directory, capacity=16,
+            event_types=[ROOM_ENTERED], post_frames=4)
+        env.reset(seed=0)
+        entered = []
+        screens = []
+        # walk off the start screen and back twice, two steps apart
+        for action in (_LEFT, _RIGHT, _LEFT):
+            while len(screens) < 1000:
+                _, _, _, _, info = env.step(action)
+                screens.append(env.unwrapped.screen.copy())
+                if ROOM_ENTERED in info['events'][:, 0]:
+                    entered.append(len(screens))
+                    break
+        for _ in range(6):
+            env.step(0)
+            screens.append(env.unwrapped.screen.copy())
+        env.close()
+
+        self.assertLess(entered[-1] - entered[0], 16)
+        end = entered[-1] + 4
+        self.assertEqual([f'event-000000-{end:08d}.npz'], self._clips())
+        with np.load(os.path.join(self.directory, self._clips()[0])) as clip:
+            frames = clip['frames']
+        np.testing.assert_array_equal(np.stack(screens[end - 16:end]), frames)
+
+    def test_ring_restarts_after_a_clip(self):
+        """A clip holds no frames from before the previous clip."""
+        env = VideoRecorder(Zelda1Env(), self.directory, capacity=256,
+            event_types=[ROOM_ENTERED], post_frames=0)
+        env.reset(seed=0)
+        steps = 0
+        for action in (_LEFT, _RIGHT):
+            while True:
+                steps += 1
+                _, _, _, _, info = env.step(action)
+                if ROOM_ENTERED in info['events'][:, 0]:
+                    break
+        env.close()
+
+        first, second = self._clips()
+        with np.load(os.path.join(self.directory, second)) as clip:
+            frames = clip['frames']
+        self.assertEqual(steps - int(first[-12:-4]), len(frames))
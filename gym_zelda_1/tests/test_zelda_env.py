@@ -3,11 +3,28 @@ from unittest import TestCase
 import warnings
 from gymnasium.utils.env_checker import check_env
 import numpy as np
+from ..zelda_env import CAVE_ENTERED
+from ..zelda_env import CONTINUE_SCREEN
 from ..zelda_env import CONTINUE_SCREEN_PULSE_2
+from ..zelda_env import DAMAGE_TAKEN
+from ..zelda_env import DEATH_STARTED
 from ..zelda_env import DEATH_SPIRAL_PULSE_2
+from ..zelda_env import INVENTORY_SCROLL_CONDITIONS
+from ..zelda_env import ITEM_ACQUIRED
+from ..zelda_env import ITEM_ADDRESSES
+from ..zelda_env import LINK_SPRITE_OFFSET
+from ..zelda_env import MAX_EVENTS
+from ..zelda_env import NO_EVENT
+from ..zelda_env import PLAYFIELD_TOP
 from ..zelda_env import REWARD_POLICY
+from ..zelda_env import ROOM_ENTERED
+from ..zelda_env import ROOM_EXITED
 from ..zelda_env import TERMINATION_POLICY
+from ..zelda_env import TILE_GRID_SHAPE
+from ..zelda_env import ZERO_HEALTH_CONDITIONS
 from ..zelda_env import Zelda1Env
+from ..zelda_env import info_records
+from ..zelda_env import object_tables
 
 
 class Zelda1EnvAPITest(TestCase):
@@ -15,6 +32,7 @@ class Zelda1EnvAPITest(TestCase):
 
     expected_info_keys = {
         'current_level',
+        'room',
         'x_pos',
         'y_pos',
         'direction',
@@ -48,6 +66,9 @@ class Zelda1EnvAPITest(TestCase):
         'has_magic_boomerang',
         'has_magic_shield',
         'max_number_of_bombs',
+        'objects',
+        'events',
+        'frames',
     }
 
     def test_reset_and_step_follow_gymnasium_api(self):
@@ -148,6 +169,47 @@ class Zelda1EnvAPITest(TestCase):
         finally:
             env.close()
 
+    def test_advance_while_cycles_actions_until_condition_fails(self):
+        """RAM conditions are checked before each cycle and capped."""
+        env = Zelda1Env(render_mode='rgb_array')
+        try:
+            env.reset(seed=123)
+            env.ram[0x0605] = 0x10
+            actions = []
+
+            def frame_advance(action):
+                actions.append(action)
+                if len(actions) == 12:
+                    env.ram[0x0605] = 0
+
+            env._frame_advance = frame_advance
+            env._skip_boring_actions()
+            self.assertEqual([0] * 12, actions)
+
+            env.ram[0xFC] = 100
+            frames = env._advance_while(INVENTORY_SCROLL_CONDITIONS, max_frames=5)
+            self.assertEqual(5, frames)
+            self.assertEqual(17, len(actions))
+        finally:
+            env.close()
+
+    def test_zero_health_conditions_match_death_recovery(self):
+        """The byte lookup tables agree with the health properties."""
+        env = Zelda1Env(render_mode='rgb_array')
+        try:
+            env.reset(seed=123)
+            for hearts in (0x00, 0x20, 0x21, 0xF0):
+                for partial in (0, 1, 255):
+                    env.ram[0x066F] = hearts
+                    env.ram[0x0670] = partial
+                    holds = all(
+                        table[env.ram[address]]
+                        for address, table in ZERO_HEALTH_CONDITIONS
+                    )
+                    self.assertEqual(env._needs_death_recovery, holds)
+        finally:
+            env.close()
+
     def test_did_step_does_not_recover_after_terminal_step(self):
         """Post-step recovery is skipped when a terminal flag is already set."""
         env = Zelda1Env(render_mode='rgb_array')
@@ -155,16 +217,267 @@ class Zelda1EnvAPITest(TestCase):
             env.reset(seed=123)
             calls = []
 
-            env._recover_from_zero_health = lambda: calls.append('recover')
-            env._wait_for_scroll = lambda: calls.append('scroll')
-            env._skip_boring_actions = lambda: calls.append('boring')
-            env._skip_inventory_scroll = lambda: calls.append('inventory')
+            def skip(name):
+                """Return a skipping routine that records its call."""
+                return lambda: calls.append(name) or 2
+
+            env._recover_from_zero_health = skip('recover')
+            env._wait_for_scroll = skip('scroll')
+            env._skip_boring_actions = skip('boring')
+            env._skip_inventory_scroll = skip('inventory')
 
             env._did_step(done=True)
             self.assertEqual([], calls)
+            self.assertEqual(1, env._step_frames)
 
             env._did_step(done=False)
             self.assertEqual(['recover', 'scroll', 'boring', 'inventory'], calls)
+            self.assertEqual(1 + 4 * 2, env._step_frames)
+        finally:
+            env.close()
+
+    def test_info_record_matches_info(self):
+        """The structured info record holds the raw bytes behind the info."""
+        env = Zelda1Env(render_mode='rgb_array')
+        try:
+            env.reset(seed=123)
+            env.step(0)
+            record = env.info_record()
+            info = env._get_info()
+
+            self.assertEqual((), record.shape)
+            for key in ('current_level', 'x_pos', 'y_pos', 'rupees', 'keys'):
+                self.assertEqual(info[key], record[key])
+            self.assertEqual(info['has_bow'], bool(record['has_bow']))
+
+            records = info_records(np.stack([env.ram, env.ram]))
+            self.assertEqual((2,), records.shape)
+            self.assertEqual(record, records[1])
+        finally:
+            env.close()
+
+    def test_object_table_decodes_slots_in_one_gather(self):
+        """The object table reads every slot's fields from RAM."""
+        env = Zelda1Env(render_mode='rgb_array')
+        try:
+            env.reset(seed=123)
+            env.ram[0x034F + 3] = 0x0E
+            env.ram[0x70 + 3] = 40
+            env.ram[0x84 + 3] = 90
+            env.ram[0x98 + 3] = 0x08
+            env.ram[0x0485 + 3] = 0x10
+            table = env._object_table
+
+            self.assertEqual((20, 5), table.shape)
+            self.assertEqual(np.uint8, table.dtype)
+            self.assertEqual([0x0E, 40, 90, 0x08, 0x10], table[3].tolist())
+            self.assertEqual([env._x_pixel, env._y_pixel], table[0, 1:3].tolist())
+
+            tables = object_tables(np.stack([env.ram, env.ram]))
+            self.assertEqual((2, 20, 5), tables.shape)
+            np.testing.assert_array_equal(table, tables[1])
+        finally:
+            env.close()
+
+    def test_tiles_observation_is_compact(self):
+        """The tiles observation holds the block grid and object table."""
+        env = Zelda1Env(obs_type='tiles')
+        try:
+            observation, info = env.reset(seed=123)
+            self.assertTrue(env.observation_space.contains(observation))
+            observation, *_, info = env.step(0)
+            self.assertTrue(env.observation_space.contains(observation))
+
+            self.assertEqual(TILE_GRID_SHAPE, observation['tiles'].shape)
+            self.assertEqual((20, 5), observation['objects'].shape)
+            self.assertEqual(
+                [env._x_pixel, env._y_pixel],
+                observation['objects'][0, 1:3].tolist(),
+            )
+            size = sum(value.nbytes for value in observation.values())
+            self.assertLess(size, 300)
+        finally:
+            env.close()
+
+    def test_unknown_obs_type_is_rejected(self):
+        """Unknown observation types raise before the emulator starts."""
+        with self.assertRaises(ValueError):
+            Zelda1Env(obs_type='ram')
+        with self.assertRaises(ValueError):
+            Zelda1Env(obs_type='roi', roi_shape=(200, 64))
+
+    def test_playfield_observation_is_a_view_without_hud(self):
+        """The playfield observation crops the HUD without copying."""
+        env = Zelda1Env(obs_type='playfield')
+        try:
+            observation, _ = env.reset(seed=123)
+            self.assertEqual((176, 256, 3), observation.shape)
+            self.assertIn(observation, env.observation_space)
+            observation, *_ = env.step(0)
+            self.assertIsNotNone(observation.base)
+            np.testing.assert_array_equal(
+                observation.base[PLAYFIELD_TOP:], observation)
+        finally:
+            env.close()
+
+    def test_roi_observation_follows_link(self):
+        """The roi observation is a window of the playfield around Link."""
+        env = Zelda1Env(obs_type='roi', roi_shape=(32, 48))
+        try:
+            observation, _ = env.reset(seed=123)
+            self.assertEqual((32, 48, 3), observation.shape)
+            self.assertIn(observation, env.observation_space)
+            screen = observation.base
+            x, y = int(env.ram[0x70]), int(env.ram[0x84])
+            top = y + LINK_SPRITE_OFFSET + 8 - 16
+            np.testing.assert_array_equal(
+                screen[top:top + 32, x + 8 - 24:x + 8 + 24], observation)
+            # windows near the edges are clamped to the playfield
+            env.ram[0x70] = 0
+            env.ram[0x84] = 0
+            window = env._roi_window(screen)
+            self.assertEqual((32, 48, 3), window.shape)
+            np.testing.assert_array_equal(
+                screen[PLAYFIELD_TOP:PLAYFIELD_TOP + 32, :48], window)
+        finally:
+            env.close()
+
+    def _events(self, info):
+        """Return the (type, value) pairs of the events of an info."""
+        events = info['events']
+        self.assertEqual((MAX_EVENTS, 3), events.shape)
+        return [
+            tuple(event[:2]) for event in events.tolist()
+            if event[0] != NO_EVENT
+        ]
+
+    def test_events_report_rooms_caves_and_items(self):
+        """Walking into the start cave and taking the sword emits events."""
+        env = Zelda1Env(render_mode='rgb_array')
+        try:
+            _, info = env.reset(seed=123)
+            self.assertEqual([], self._events(info))
+            events = []
+            while env.ram[0x70] > 64:
+                events += self._events(env.step(0b01000000)[-1])
+            for _ in range(60):
+                events += self._events(env.step(0b00010000)[-1])
+            self.assertEqual([(CAVE_ENTERED, 0x77)], events)
+            # wait out the old man's text, then walk up to the sword
+            for _ in range(10):
+                env.step(0)
+            while env.ram[0x70] < 120:
+                env.step(0b10000000)
+            events = []
+            for _ in range(50):
+                events += self._events(env.step(0b00010000)[-1])
+            self.assertIn((ITEM_ACQUIRED, ITEM_ADDRESSES.index(0x0657)), events)
+        finally:
+            env.close()
+
+    def test_events_report_room_transitions(self):
+        """Leaving a screen emits the exited and entered rooms."""
+        env = Zelda1Env(render_mode='rgb_array')
+        try:
+            env.reset(seed=123)
+            events = []
+            while env.ram[0xEB] == 0x77:
+                info = env.step(0b01000000)[-1]
+                events += self._events(info)
+            self.assertEqual([(ROOM_EXITED, 0x77), (ROOM_ENTERED, 0x76)], events)
+            # room events carry the level of the room (0 is the overworld)
+            self.assertEqual([0, 0], info['events'][:2, 2].tolist())
+            # the step that leaves the room also emulates the scroll
+            self.assertLess(1, info['frames'])
+            info = env.step(0b01000000)[-1]
+            self.assertEqual([], self._events(info))
+            self.assertEqual(1, info['frames'])
+        finally:
+            env.close()
+
+    def test_load_state_restores_a_snapshot(self):
+        """Loading a snapshot restores the RAM without stale events."""
+        env = Zelda1Env(render_mode='rgb_array')
+        try:
+            env.reset(seed=123)
+            snapshot = env.dump_state()
+            ram = env.ram.copy()
+            while env.ram[0xEB] == 0x77:
+                env.step(0b01000000)
+            env.load_state(snapshot)
+            np.testing.assert_array_equal(ram, env.ram)
+            self.assertEqual([], self._events(env.step(0)[-1]))
+        finally:
+            env.close()
+
+    def test_events_report_damage_and_death(self):
+        """Lost health and the skipped death sequence are events."""
+        env = Zelda1Env(render_mode='rgb_array')
+        try:
+            env.reset(seed=123)
+            env.ram[0x0670] = 0x7F
+            events = self._events(env.step(0)[-1])
+            self.assertEqual([(DAMAGE_TAKEN, env.ram[0x066F] & 0x0F)], events)
+
+            # zero health and let the continue flow restore it a few frames
+            # into the death recovery
+            env.ram[0x066F] &= 0xF0
+            env.ram[0x0670] = 0
+            frame_advance = env._frame_advance
+            frames = []
+
+            def advance(action):
+                frame_advance(action)
+                frames.append(action)
+                if len(frames) == 4:
+                    env.ram[0x0670] = 255
+
+            env._frame_advance = advance
+            events = self._events(env.step(0)[-1])
+            self.assertEqual(
+                [DAMAGE_TAKEN, DEATH_STARTED, CONTINUE_SCREEN],
+                [event_type for event_type, _ in events],
+            )
+            self.assertEqual([], self._events(env.step(0)[-1]))
+        finally:
+            env.close()
+
+    def test_death_events_fire_once_per_death(self):
+        """Steps that stay at zero health do not repeat the death events."""
+        env = Zelda1Env(render_mode='rgb_array')
+        try:
+            env.reset(seed=123)
+            env.ram[0x066F] &= 0xF0
+            env.ram[0x0670] = 0
+            # a continue flow that advances but never restores the hearts
+            env._recover_from_zero_health = lambda: 2
+            types = [[t for t, _ in self._events(env.step(0)[-1])]
+                for _ in range(2)]
+            self.assertEqual([DEATH_STARTED, CONTINUE_SCREEN], types[0][-2:])
+            self.assertNotIn(DEATH_STARTED, types[1])
+            self.assertNotIn(CONTINUE_SCREEN, types[1])
+        finally:
+            env.close()
+
+    def test_reset_perturbations_are_seeded(self):
+        """Start state perturbations are reproducible and decorrelated."""
+        env = Zelda1Env()
+        try:
+            options = dict(noop_max=30, randomize_rng=True)
+            states = []
+            for seed in (1, 2, 1):
+                env.reset(seed=seed, options=options)
+                states.append(env.ram.copy())
+            np.testing.assert_array_equal(states[0], states[2])
+            self.assertFalse(np.array_equal(states[0], states[1]))
+
+            env.reset(seed=1)
+            unperturbed = env.ram.copy()
+            env.reset(seed=2)
+            np.testing.assert_array_equal(unperturbed, env.ram)
+
+            with self.assertRaises(ValueError):
+                env.reset(options=dict(noop_max=-1))
         finally:
             env.close()
 
@@ -0,0 +1,227 @@
+"""A single-process batch of Zelda 1 emulators stepped on a thread pool."""
+from concurrent.futures import ThreadPoolExecutor
+import os
+from gymnasium import spaces
+from gymnasium.vector.utils import batch_space
+from gymnasium.vector.utils import create_empty_array
+from nes_py.wrappers import JoypadSpace
+import numpy as np
+from .zelda_env import EVENT_FIELDS
+from .zelda_env import MAX_EVENTS
+from .zelda_env import Zelda1Env
+from .zelda_env import info_records
+from .zelda_env import object_tables
+
+
+def _buttons(actions):
+    """
+    Return the controller byte of each action of a discrete action list.
+
+    Args:
+        actions: a list of button lists, e.g., actions.MOVEMENT
+
+    Returns:
+        a uint8 array with one controller byte per action
+
+    """
+    buttons = np.zeros(len(actions), dtype=np.uint8)
+    for index, action in enumerate(actions):
+        for button in action:
+            buttons[index] |= JoypadSpace._button_map[button]
+    return buttons
+
+
+class ThreadedZelda1Env:
+    """A batch of Zelda 1 environments that share one process."""
+
+    def __init__(self, num_envs, actions=None, num_threads=None, **kwargs):
+        """
+        Initialize a new batch of environments.
+
+        Args:
+            num_envs: the number of emulators to step in lockstep
+            actions: an optional list of button lists (e.g., MOVEMENT) that
+                step actions index into. by default actions are raw
+                controller bytes
+            num_threads: the number of emulation threads (defaults to the
+                smaller of num_envs and the number of CPUs)
+            kwargs: keyword arguments for each Zelda1Env
+
+        Returns:
+            None
+
+        Notes:
+            nes-py's Cython NativeEmulator releases the GIL while
+            frame_advance emulates a frame, so the frames of the batch, and
+            of the frame skipping of each environment, run in parallel on
+            the thread pool. The Python checks between skipped frames hold
+            the GIL, and the rewards and flags are computed once over the
+            batch. The scaling with the number of threads has not been
+            measured. nes-py's VectorNESEmulator batches frames natively,
+            but it owns its emulators, so the RAM hacks and frame skipping
+            of Zelda1Env cannot run on them
+
+        """
+        if num_envs < 1:
+            raise ValueError('num_envs must be positive')
+        self.num_envs = num_envs
+        self.envs = [Zelda1Env(**kwargs) for _ in range(num_envs)]
+        self._buttons = None if actions is None else _buttons(actions)
+        if actions is None:
+            self.single_action_space = self.envs[0].action_space
+        else:
+            self.single_action_space = spaces.Discrete(len(actions))
+        self.action_space = batch_space(self.single_action_space, num_envs)
+        self.single_observation_space = self.envs[0].observation_space
+        self.observation_space = batch_space(
+            self.single_observation_space, num_envs)
+        threads = num_threads or min(num_envs, os.cpu_count() or 1)
+        self._executor = ThreadPoolExecutor(threads)
+        # preallocate the batched buffers that each step fills in place
+        self._observations = create_empty_array(
+            self.single_observation_space, num_envs)
+        self._ram = np.empty((num_envs, len(self.envs[0].ram)), dtype=np.uint8)
+        self._rewards = np.zeros(num_envs, dtype=np.float32)
+        self._terminated = np.zeros(num_envs, dtype=bool)
+        self._truncated = np.zeros(num_envs, dtype=bool)
+        # the info['events'] array of each environment after the last step
+        self.events = np.zeros(
+            (num_envs, MAX_EVENTS, len(EVENT_FIELDS)), dtype=np.uint8)
+
+    def _map(self, function, *iterables):
+        """Call a function over the environments on the thread pool."""
+        return list(self._executor.map(function, *iterables))
+
+    def _write_observation(self, index, observation):
+        """Write the observation of an environment into the batch."""
+        if isinstance(observation, dict):
+            for key, value in observation.items():
+                self._observations[key][index] = value
+        else:
+            self._observations[index] = observation
+
+    def _records(self):
+        """Return the batched info records of the environments."""
+        for index, env in enumerate(self.envs):
+            self._ram[index] = env.ram
+        return info_records(self._ram)
+
+    def reset(self, *, seed=None, options=None, mask=None):
+        """
+        Reset every environment, or the environments of a mask.
+
+        Args:
+            seed: None, a base seed (environment i uses seed + i), or a list
+                of one seed per environment
+            options: the reset options passed to every reset environment
+            mask: an optional boolean array of the environments to reset,
+                e.g., the terminated or truncated flags of the last step
+
+        Returns:
+            a tuple of the batched observations and INFO_RECORD_DTYPE records
+
+        Notes:
+            observations of the environments that are not reset are kept,
+            and those of reset environments are overwritten (copy the final
+            observations of a step before resetting its finished episodes)
+
+        """
+        if seed is None or isinstance(seed, int):
+            seeds = [
+                None if seed is None else seed + index
+                for index in range(self.num_envs)
+            ]
+        else:
+            seeds = list(seed)
+            if len(seeds) != self.num_envs:
+                raise ValueError(f'expected {self.num_envs} seeds')
+        if mask is None:
+            indices = range(self.num_envs)
+        else:
+            mask = np.asarray(mask, dtype=bool)
+            if mask.shape != (self.num_envs,):
+                raise ValueError(f'expected a mask of {self.num_envs} flags')
+            indices = np.flatnonzero(mask).tolist()
+
+        def reset(index):
+            """Reset one environment and write its observation."""
+            env = self.envs[index]
+            observation, info = env.reset(seed=seeds[index], options=options)
+            self._write_observation(index, observation)
+            self.events[index] = info['events']
+
+        self._map(reset, indices)
+        return self._observations, self._records()
+
+    def step(self, actions):
+        """
+        Step every environment with one action each.
+
+        Args:
+            actions: an array of num_envs actions
+
+        Returns:
+            a tuple of the batched observations, rewards, terminated and
+            truncated flags, and INFO_RECORD_DTYPE records. the returned
+            arrays are reused by the next step. the events of the step are
+            in the events attribute. finished environments must be reset
+            (e.g., with reset(mask=terminated | truncated)) before the next
+            step
+
+        """
+        actions = np.asarray(actions)
+        if actions.shape != (self.num_envs,):
+            raise ValueError(f'expected {self.num_envs} actions')
+        if any(env.done for env in self.envs):
+            raise ValueError('cannot step in a done environment! call `reset`')
+        buttons = actions.astype(np.uint8)
+        if self._buttons is not None:
+            buttons = self._buttons[actions]
+        # emulate the frame of every environment in parallel
+        self._map(
+            lambda env, button: env._frame_advance(button),
+            self.envs,
+            buttons,
+        )
+        # compute the transition of the frame over the whole batch, like
+        # NESEnv.step does before the frame skipping of _did_step
+        records = self._records()
+        task = self.envs[0].task
+        if task is not None:
+            # check the task of every environment in one vectorized call
+            success = task.success(records, object_tables(self._ram))
+            self._rewards[:] = success
+            self._terminated[:] = success
+        for index, env in enumerate(self.envs):
+            if task is None:
+                self._rewards[index] = env._get_reward()
+                self._terminated[index] = env._get_terminated()
+            self._truncated[index] = env._get_truncated()
+            env.done = bool(self._terminated[index] or self._truncated[index])
+
+        def skip(index, env):
+            """Skip the frames of one environment and write its observation."""
+            env._did_step(env.done)
+            # finish the step the way Zelda1Env.step does, which observes the
+            # screen view and only copies the pixels the batch buffer keeps
+            self._write_observation(index, env._observe(env.screen))
+            self.events[index] = env._events
+
+        self._map(skip, range(self.num_envs), self.envs)
+        return (
+            self._observations,
+            self._rewards,
+            self._terminated,
+            self._truncated,
+            records,
+        )
+
+    def close(self):
+        """Close the thread pool and every environment."""
+        self._executor.shutdown()
+        for env in self.envs:
+            env.close()
+
+
+# explicitly define the outward facing API of this module
+__all__ = [ThreadedZelda1Env.__name__]
@@ -0,0 +1,228 @@
+"""Triggered rollout recording with encoding on a background process."""
+import importlib.util
+import multiprocessing
+from multiprocessing import resource_tracker
+from multiprocessing import shared_memory
+import os
+import gymnasium as gym
+from nes_py.nes_env import OBSERVATION_MODE_RGB_ARRAY_CONTIGUOUS
+import numpy as np
+
+
+# the file formats that clips can be encoded to. npz needs only NumPy, the
+# other formats need the optional imageio package (and a plugin for mp4)
+VIDEO_FORMATS = ('npz', 'gif', 'mp4')
+
+
+def _encode(frames, path, fps):
+    """
+    Encode frames to a file.
+
+    Args:
+        frames: a uint8 array with shape (frames, height, width, 3)
+        path: the path of the file to write (its extension sets the format)
+        fps: the frame rate of the video
+
+    Returns:
+        None
+
+    """
+    if path.endswith('.npz'):
+        np.savez_compressed(path, frames=frames)
+        return
+    import imageio.v3 as iio
+    if path.endswith('.gif'):
+        iio.imwrite(path, frames, duration=1000 / fps, loop=0)
+    else:
+        iio.imwrite(path, frames, fps=fps)
+
+
+def _encode_worker(jobs):
+    """Encode the ring buffers in shared memory that arrive on a queue."""
+    while True:
+        job = jobs.get()
+        if job is None:
+            return
+        name, shape, start, count, path, fps = job
+        memory = shared_memory.SharedMemory(name=name)
+        try:
+            ring = np.ndarray(shape, np.uint8, memory.buf)
+            order = (start + np.arange(count)) % len(ring)
+            _encode(ring[order], path, fps)
+        finally:
+            memory.close()
+            memory.unlink()
+
+
+class VideoRecorder(gym.Wrapper):
+    """A wrapper that records selected episodes and triggered clips."""
+
+    def __init__(self, env, directory,
+        capacity=600,
+        episode_trigger=None,
+        event_types=(),
+        post_frames=60,
+        fps=60,
+        video_format='npz',
+    ):
+        """
+        Initialize a new video recorder.
+
+        Args:
+            env: the Zelda1Env (or wrapper of one) to record
+            directory: the directory to write clips to
+            capacity: the number of frames in the ring buffer, i.e., the
+                maximum length of a clip
+            episode_trigger: an optional callable that maps an episode index
+                to whether to record the (last capacity frames of the) whole
+                episode
+            event_types: the info['events'] types (e.g., DEATH_STARTED) that
+                trigger a clip of the frames around the event
+            post_frames: the number of frames to keep recording after an
+                event before its clip is encoded
+            fps: the frame rate of the encoded videos
+            video_format: the format to encode clips to (see VIDEO_FORMATS)
+
+        Returns:
+            None
+
+        Notes:
+            the emulator copies each captured frame straight into a ring
+            buffer in shared memory. a clip hands the whole ring to a worker
+            process that orders and encodes its frames, and the next frame
+            starts a new ring, so the stepping process never copies, encodes,
+            or pickles a clip. an event during the post_frames of a clip
+            extends the clip
+
+        """
+        super().__init__(env)
+        if video_format not in VIDEO_FORMATS:
+            raise ValueError(f'video_format must be one of {VIDEO_FORMATS}')
+        needs_imageio = video_format != 'npz'
+        if needs_imageio and importlib.util.find_spec('imageio') is None:
+            raise ImportError(f'{video_format} videos require imageio')
+        if capacity <= 0 or post_frames < 0:
+            raise ValueError('capacity must be positive and post_frames >= 0')
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.capacity = capacity
+        self.episode_trigger = episode_trigger
+        self.event_types = np.array(sorted(event_types), dtype=np.uint8)
+        self.post_frames = post_frames
+        self.fps = fps
+        self.video_format = video_format
+        self.episode_id = -1
+        self._memory = None
+        self._frames = None
+        self._cursor = 0
+        self._step = 0
+        self._recording_episode = False
+        self._countdown = None
+        # start the tracker of shared memory before the worker so that both
+        # processes share it, and the worker unlinking a clip unregisters it
+        resource_tracker.ensure_running()
+        self._jobs = multiprocessing.Queue()
+        self._worker = multiprocessing.Process(
+            target=_encode_worker,
+            args=(self._jobs,),
+            daemon=True,
+        )
+        self._worker.start()
+
+    def _capture(self):
+        """Copy the current screen into the ring buffer."""
+        unwrapped = self.env.unwrapped
+        if self._frames is None:
+            shape = (self.capacity, *unwrapped.screen.shape)
+            self._memory = shared_memory.SharedMemory(create=True,
+                size=int(np.prod(shape)),
+            )
+            self._frames = np.ndarray(shape, np.uint8, self._memory.buf)
+        slot = self._frames[self._cursor % self.capacity]
+        unwrapped.observation(OBSERVATION_MODE_RGB_ARRAY_CONTIGUOUS, slot)
+        self._cursor += 1
+
+    def _release(self):
+        """Detach the ring buffer and start the next capture at its start."""
+        self._frames = None
+        self._memory.close()
+        self._memory = None
+        self._cursor = 0
+
+    def _flush(self, name):
+        """Send the frames in the ring buffer to the encoder as a clip."""
+        count = min(self._cursor, self.capacity)
+        if not count:
+            return
+        start = (self._cursor - count) % self.capacity
+        path = os.path.join(self.directory, f'{name}.{self.video_format}')
+        job = (self._memory.name, self._frames.shape, start, count, path)
+        self._jobs.put((*job, self.fps))
+        # the encoder owns the ring buffer now, so the next clip has a new one
+        self._release()
+
+    def _clip_name(self, kind):
+        """Return the file name of a clip of the current episode."""
+        return f'{kind}-{self.episode_id:06d}-{self._step:08d}'
+
+    def _end_episode(self):
+        """Encode the recording of an episode that ended."""
+        if self._recording_episode:
+            self._flush(self._clip_name('episode'))
+        elif self._countdown is not None:
+            self._flush(self._clip_name('event'))
+        self._countdown = None
+
+    @property
+    def _is_capturing(self):
+        """Return True if steps of the episode are captured."""
+        return self._recording_episode or len(self.event_types) > 0
+
+    def reset(self, *, seed=None, options=None):
+        """Reset the environment and begin capturing the next episode."""
+        self._end_episode()
+        result = self.env.reset(seed=seed, options=options)
+        self.episode_id += 1
+        self._cursor = 0
+        self._step = 0
+        trigger = self.episode_trigger
+        self._recording_episode = bool(trigger and trigger(self.episode_id))
+        if self._is_capturing:
+            self._capture()
+        return result
+
+    def step(self, action):
+        """Step the environment and capture the frame when recording."""
+        result = self.env.step(action)
+        self._step += 1
+        if not self._is_capturing:
+            return result
+        self._capture()
+        info = result[-1]
+        if len(self.event_types):
+            # a repeated event extends the clip of the pending one
+            if np.isin(info['events'][:, 0], self.event_types).any():
+                self._countdown = self.post_frames
+        if self._countdown is not None and not self._recording_episode:
+            if self._countdown == 0:
+                self._flush(self._clip_name('event'))
+                self._countdown = None
+            else:
+                self._countdown -= 1
+        return result
+
+    def close(self):
+        """Encode the pending clips, stop the encoder, and close the env."""
+        if self._worker.is_alive():
+            self._end_episode()
+            self._recording_episode = False
+            self._jobs.put(None)
+            self._worker.join()
+        if self._memory is not None:
+            self._memory.unlink()
+            self._release()
+        super().close()
+
+
+# explicitly define the outward facing API of this module
+__all__ = [VideoRecorder.__name__]
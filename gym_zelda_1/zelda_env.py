@@ -1,8 +1,11 @@
 """A Gymnasium environment for The Legend of Zelda."""
 import collections
 import os
+from gymnasium import spaces
 from nes_py import NESEnv
 import numpy as np
+from .tasks import EXIT_BUTTONS
+from .tasks import Task
 
 
 # the directory that houses this module
@@ -26,6 +29,10 @@ DIRECTIONS = collections.defaultdict(lambda: None, {
 SCROLL_GAME_MODES = {4, 6, 7}
 
 
+# the RAM addresses of the game's random number generator state
+RNG_ADDRESSES = slice(0x18, 0x25)
+
+
 # Zelda1-v0 is a navigation and state-inspection sandbox. These labels make
 # the intentionally neutral RL contract explicit in code and documentation.
 REWARD_POLICY = 'navigation_state_inspection_sandbox_zero_reward'
@@ -102,19 +109,309 @@ RING_TYPES = collections.defaultdict(lambda: None, {
 })
 
 
+# the RAM address behind each field of the structured info record. fields hold
+# raw RAM bytes named after the matching `_get_info` keys, except for the
+# packed heart byte (heart containers and full hearts) and the partial heart
+INFO_RECORD_FIELDS = (
+    ('current_level', 0x10),
+    ('room', 0xEB),
+    ('x_pos', 0x70),
+    ('y_pos', 0x84),
+    ('direction', 0x98),
+    ('has_candled', 0x0513),
+    ('pulse_1', 0x0605),
+    ('pulse_2', 0x0607),
+    ('killed_enemies', 0x0627),
+    ('number_of_deaths', 0x0630),
+    ('sword', 0x0657),
+    ('number_of_bombs', 0x0658),
+    ('arrows_type', 0x0659),
+    ('has_bow', 0x065A),
+    ('candle_type', 0x065B),
+    ('has_whistle', 0x065C),
+    ('has_food', 0x065D),
+    ('potion_type', 0x065E),
+    ('has_magic_rod', 0x065F),
+    ('has_raft', 0x0660),
+    ('has_magic_book', 0x0661),
+    ('ring_type', 0x0662),
+    ('has_step_ladder', 0x0663),
+    ('has_magic_key', 0x0664),
+    ('has_power_bracelet', 0x0665),
+    ('has_letter', 0x0666),
+    ('is_clock_possessed', 0x066C),
+    ('rupees', 0x066D),
+    ('keys', 0x066E),
+    ('hearts_packed', 0x066F),
+    ('partial_heart', 0x0670),
+    ('has_boomerang', 0x0674),
+    ('has_magic_boomerang', 0x0675),
+    ('has_magic_shield', 0x0676),
+    ('max_number_of_bombs', 0x067C),
+)
+
+
+# the NumPy structured type of an info record (one byte per field)
+INFO_RECORD_DTYPE = np.dtype([
+    (name, np.uint8) for name, _ in INFO_RECORD_FIELDS
+])
+
+
+# the RAM addresses to gather into an info record in a single fancy index
+_INFO_RECORD_ADDRESSES = np.array([addr for _, addr in INFO_RECORD_FIELDS])
+
+
+def info_records(ram):
+    """
+    Gather structured info records from one or more RAM vectors.
+
+    Args:
+        ram: a uint8 array of NES RAM with shape (..., 0x800)
+
+    Returns:
+        an array of INFO_RECORD_DTYPE with shape ram.shape[:-1]
+
+    """
+    records = np.ascontiguousarray(ram[..., _INFO_RECORD_ADDRESSES])
+    return records.view(INFO_RECORD_DTYPE).reshape(ram.shape[:-1])
+
+
+# the observation types that Zelda1Env can return
+OBS_TYPES = ('rgb', 'tiles', 'playfield', 'roi')
+
+
+# the first screen row of the playfield (the rows above it hold the HUD)
+PLAYFIELD_TOP = 64
+
+
+# the shape of the playfield in pixels (rows, columns)
+PLAYFIELD_SHAPE = (240 - PLAYFIELD_TOP, 256)
+
+
+# the number of screen rows between Link's y pixel in RAM and his sprite
+LINK_SPRITE_OFFSET = 3
+
+
+# the default shape of the window around Link of the 'roi' observation
+ROI_SHAPE = (64, 64)
+
+
+# the edge length in pixels of a playfield block (a 2x2 group of NES tiles)
+BLOCK_SIZE = 16
+
+
+# the stride in pixels between the samples that classify a playfield block
+BLOCK_SAMPLE_STRIDE = 2
+
+
+# the shape of the tile grid observation in playfield blocks (rows, columns)
+TILE_GRID_SHAPE = (11, 16)
+
+
+# the number of object slots in RAM. slot 0 holds Link, slots 1-11 hold
+# enemies, and slots 12-19 hold weapons and projectiles
+NUM_OBJECT_SLOTS = 20
+
+
+# the columns of the object table and the RAM base address of each column.
+# a type of 0 marks an empty slot
+OBJECT_FIELDS = ('type', 'x', 'y', 'direction', 'hp')
+OBJECT_TABLE_BASES = (0x034F, 0x70, 0x84, 0x98, 0x0485)
+
+
+# the RAM addresses to gather into the object table in a single fancy index
+_OBJECT_TABLE_ADDRESSES = (
+    np.arange(NUM_OBJECT_SLOTS)[:, None] + np.array(OBJECT_TABLE_BASES)
+)
+
+
+# the offset of each playfield block into a flat array of color histograms
+_BLOCK_HISTOGRAM_OFFSETS = 64 * np.arange(np.prod(TILE_GRID_SHAPE))[:, None]
+
+
+# the maximum number of frames that a single frame skipping routine may run
+MAX_SKIP_FRAMES = 10000
+
+
+def _ram_condition(address, predicate):
+    """
+    Return a RAM condition that holds while a byte satisfies a predicate.
+
+    Args:
+        address: the RAM address of the byte to check
+        predicate: a callable that maps a byte value to True or False
+
+    Returns:
+        a tuple of the address and a 256 entry lookup table of the predicate
+
+    """
+    return address, tuple(bool(predicate(value)) for value in range(256))
+
+
+# the conditions that hold while the frame skipping routines should advance
+ZERO_HEALTH_CONDITIONS = (
+    _ram_condition(0x066F, lambda value: value & 0x0F == 0),
+    _ram_condition(0x0670, lambda value: value == 0),
+)
+SCROLL_CONDITIONS = (_ram_condition(0x12, SCROLL_GAME_MODES.__contains__),)
+TEXT_CONDITIONS = (_ram_condition(0x0605, lambda value: value == 0x10),)
+CAVE_CONDITIONS = (_ram_condition(0x0606, lambda value: value == 0x08),)
+INVENTORY_SCROLL_CONDITIONS = (_ram_condition(0xFC, lambda value: 65 < value),)
+
+
+# the game mode while Link is inside a cave
+CAVE_GAME_MODE = 0x0B
+
+
+# the types of events in the per-step event array. the value of an event is
+# the room for room, death, continue, and cave events, the index into
+# ITEM_ADDRESSES for item events, and the full hearts left for damage events.
+# the level of an event is the level it happened in (the level of the room
+# Link left for room exits)
+EVENT_TYPES = (
+    'none',
+    'room_exited',
+    'room_entered',
+    'item_acquired',
+    'damage_taken',
+    'death_started',
+    'continue_screen',
+    'cave_entered',
+)
+NO_EVENT = 0
+ROOM_EXITED = 1
+ROOM_ENTERED = 2
+ITEM_ACQUIRED = 3
+DAMAGE_TAKEN = 4
+DEATH_STARTED = 5
+CONTINUE_SCREEN = 6
+CAVE_ENTERED = 7
+
+
+# the number of event slots per step and the columns of each event
+MAX_EVENTS = 8
+EVENT_FIELDS = ('type', 'value', 'level')
+
+
+# the RAM addresses of the equipment whose increase is an item event
+ITEM_ADDRESSES = (
+    0x0657, 0x0659, 0x065A, 0x065B, 0x065C, 0x065D, 0x065E, 0x065F, 0x0660,
+    0x0661, 0x0662, 0x0663, 0x0664, 0x0665, 0x0666, 0x0674, 0x0675, 0x0676,
+)
+
+
+# the RAM addresses of the state that events compare between steps (level,
+# room, game mode, hearts, partial heart, and then the items)
+_EVENT_ADDRESSES = np.array(
+    [0x10, 0xEB, 0x12, 0x066F, 0x0670, *ITEM_ADDRESSES])
+
+
+def object_tables(ram):
+    """
+    Gather the object tables from one or more RAM vectors.
+
+    Args:
+        ram: a uint8 array of NES RAM with shape (..., 0x800)
+
+    Returns:
+        a uint8 array with shape (..., NUM_OBJECT_SLOTS, len(OBJECT_FIELDS))
+
+    """
+    return ram[..., _OBJECT_TABLE_ADDRESSES]
+
+
 class Zelda1Env(NESEnv):
     """An environment for playing The Legend of Zelda with Gymnasium."""
 
     # the legal range of rewards for each step
     reward_range = (-float('inf'), float('inf'))
 
-    def __init__(self, render_mode=None):
-        """Initialize a new Zelda 1 environment."""
+    def __init__(self,
+        render_mode=None,
+        obs_type='rgb',
+        roi_shape=ROI_SHAPE,
+        low_memory=False,
+        task=None,
+        task_params=None,
+    ):
+        """
+        Initialize a new Zelda 1 environment.
+
+        Args:
+            render_mode: the Gymnasium render mode
+            obs_type: the type of observation to return, one of:
+            - 'rgb': the full RGB screen
+            - 'tiles': a compact dictionary of the playfield tile grid and
+              the object table (under 300 bytes per step)
+            - 'playfield': a view of the screen without the HUD
+            - 'roi': a view of the (height, width) window of the playfield
+              around Link
+            roi_shape: the (height, width) of the 'roi' window
+            low_memory: whether to return 'playfield' and 'roi'
+              observations as compact copies of their pixels instead of
+              views of the emulator's screen
+            task: an optional name of a task in tasks.TASKS. each episode
+              starts from the task's start state (the start screen for all
+              but clear_room), the reward is 1.0 and the episode terminates
+              on the step that completes the task
+            task_params: optional parameters that override the task's
+              defaults, e.g., dict(level=0, room=0x66) for 'reach_room'
+
+        Returns:
+            None
+
+        """
+        if obs_type not in OBS_TYPES:
+            raise ValueError(f'obs_type must be one of {OBS_TYPES}')
+        height, width = roi_shape
+        max_height, max_width = PLAYFIELD_SHAPE
+        if not (0 < height <= max_height and 0 < width <= max_width):
+            raise ValueError('roi_shape must fit inside the playfield')
         super().__init__(ROM_PATH, render_mode=render_mode)
+        self.obs_type = obs_type
+        self.roi_shape = (height, width)
+        self.low_memory = low_memory
+        self._reset_options = {}
+        # the task is applied once the start screen is backed up
+        task = None if task is None else Task(task, **(task_params or {}))
+        self.task = None
+        self._task_complete = False
+        # the snapshot of the task's start state that resets restore
+        self._start_state = None
+        # the per-step event array and the state that events compare
+        self._events = np.zeros(
+            (MAX_EVENTS, len(EVENT_FIELDS)), dtype=np.uint8)
+        self._num_events = 0
+        self._event_state = None
+        self._pre_skip_state = None
+        self._death_started = False
+        self._continued = False
+        # whether the last step was dying or continuing, so that the death
+        # and continue events fire once when they start
+        self._dying = False
+        self._continuing = False
+        # the number of frames that the last step emulated
+        self._step_frames = 0
+        if obs_type == 'tiles':
+            self.observation_space = spaces.Dict({
+                'tiles': spaces.Box(0, 255, TILE_GRID_SHAPE, np.uint8),
+                'objects': spaces.Box(
+                    0, 255, _OBJECT_TABLE_ADDRESSES.shape, np.uint8),
+            })
+        elif obs_type == 'playfield':
+            shape = (*PLAYFIELD_SHAPE, 3)
+            self.observation_space = spaces.Box(0, 255, shape, np.uint8)
+        elif obs_type == 'roi':
+            shape = (*self.roi_shape, 3)
+            self.observation_space = spaces.Box(0, 255, shape, np.uint8)
         # reset the emulator, skip the start screen, and create a backup state
         self.reset()
         self._skip_start_screen()
         self._backup()
+        # walk to the task's start state once and snapshot it for resets
+        if task is not None and task.exits:
+            self._start_state = self._walk_to_start_state(task)
+        self.task = task
 
     # MARK: Memory access
 
@@ -128,6 +425,11 @@ class Zelda1Env(NESEnv):
         """Return the current level Link is in."""
         return self.ram[0x10]
 
+    @property
+    def _current_room(self):
+        """Return the current room (row * 16 + column) of the level."""
+        return self.ram[0xEB]
+
     @property
     def _current_save_slot(self):
         """Return the current save slot being played on."""
@@ -377,43 +679,315 @@ class Zelda1Env(NESEnv):
         while self._direction is None or bool(self.ram[0x007C]):
             self._frame_advance(0)
 
+    def _advance_while(self,
+        conditions,
+        actions=(0,),
+        max_frames=MAX_SKIP_FRAMES,
+    ):
+        """
+        Advance frames while every condition on RAM holds.
+
+        Args:
+            conditions: a tuple of (address, table) pairs from _ram_condition
+            actions: the cycle of controller bytes to press, checking the
+                conditions before each cycle
+            max_frames: the maximum number of frames to advance
+
+        Returns:
+            the number of frames advanced
+
+        """
+        ram = self.ram
+        frame_advance = self._frame_advance
+        frames = 0
+        while frames < max_frames:
+            for address, table in conditions:
+                if not table[ram[address]]:
+                    return frames
+            for action in actions:
+                frame_advance(action)
+            frames += len(actions)
+        return frames
+
     def _recover_from_zero_health(self):
-        """Advance through the non-terminal death and continue sequence."""
-        while self._needs_death_recovery:
-            self._frame_advance(8)
-            self._frame_advance(0)
+        """
+        Advance through the non-terminal death and continue sequence.
+
+        Returns:
+            the number of frames advanced
+
+        """
+        return self._advance_while(ZERO_HEALTH_CONDITIONS, (8, 0))
 
     def _wait_for_scroll(self):
-        """Wait for the screen to stop scrolling."""
-        while self._is_screen_scrolling:
-            self._frame_advance(8)
-            self._frame_advance(0)
+        """Wait for the screen to stop scrolling and return the frames."""
+        return self._advance_while(SCROLL_CONDITIONS, (8, 0))
 
     def _skip_boring_actions(self):
-        """Skip actions that the agent will find boring."""
-        # displaying text
-        while self.ram[0x0605] == 0x10:
-            # each character takes 6 frames to draw
-            for _ in range(6):
-                self._frame_advance(0)
+        """Skip boring actions (text and caves) and return the frames."""
+        # displaying text, where each character takes 6 frames to draw
+        frames = self._advance_while(TEXT_CONDITIONS, (0,) * 6)
         # entering / exiting cave
-        while self.ram[0x0606] == 0x08:
-            self._frame_advance(0)
+        return frames + self._advance_while(CAVE_CONDITIONS)
 
     def _skip_inventory_scroll(self):
-        """Skip the scrolling action when showing / hiding inventory."""
-        while 65 < self.ram[0xFC]:
-            self._frame_advance(0)
+        """Skip the inventory scroll and return the frames."""
+        return self._advance_while(INVENTORY_SCROLL_CONDITIONS)
+
+    def _walk_to_start_state(self, task):
+        """
+        Walk Link through the exits that lead to the start state of a task.
+
+        Args:
+            task: the task with the exits to walk through from the start
+                screen
+
+        Returns:
+            a snapshot of the start state from dump_state
+
+        """
+        for room_exit in task.exits:
+            room = self._current_room
+            for _ in range(MAX_SKIP_FRAMES):
+                if self._current_room != room:
+                    break
+                self.step(EXIT_BUTTONS[room_exit])
+            else:
+                raise RuntimeError(
+                    f'failed to leave room {room} through {room_exit}')
+        return self.dump_state()
+
+    # MARK: Events
+
+    def _emit(self, event_type, value, level):
+        """Write an event to the next free slot of the event array."""
+        if self._num_events < MAX_EVENTS:
+            self._events[self._num_events] = (event_type, value, level)
+            self._num_events += 1
+
+    def _clear_event_state(self):
+        """Forget the state that events compare, e.g., after a reset."""
+        self._event_state = None
+        self._dying = False
+        self._continuing = False
+
+    def _update_events(self):
+        """Fill the event array with the changes since the last step."""
+        self._events[:] = NO_EVENT
+        self._num_events = 0
+        previous = self._event_state
+        current = self.ram[_EVENT_ADDRESSES]
+        # the state before the frame skipping catches damage and deaths that
+        # the death recovery has already undone by the end of the step
+        pre_skip = self._pre_skip_state
+        if pre_skip is None:
+            pre_skip = current
+        if previous is not None:
+            level, room, mode = previous[:3]
+            if (level, room) != tuple(current[:2]):
+                self._emit(ROOM_EXITED, room, level)
+                self._emit(ROOM_ENTERED, current[1], current[0])
+            for index in np.flatnonzero(current[5:] > previous[5:]):
+                self._emit(ITEM_ACQUIRED, index, current[0])
+            hearts = (previous[3] & 0x0F, previous[4])
+            if (pre_skip[3] & 0x0F, pre_skip[4]) < hearts:
+                self._emit(DAMAGE_TAKEN, pre_skip[3] & 0x0F, current[0])
+            if self._death_started:
+                self._emit(DEATH_STARTED, current[1], current[0])
+            if self._continued:
+                self._emit(CONTINUE_SCREEN, current[1], current[0])
+            if mode != CAVE_GAME_MODE and current[2] == CAVE_GAME_MODE:
+                self._emit(CAVE_ENTERED, current[1], current[0])
+        self._event_state = current
+        self._pre_skip_state = None
+        self._death_started = False
+        self._continued = False
+
+    # MARK: Observations
+
+    @property
+    def _object_table(self):
+        """Return the OBJECT_FIELDS row of each object slot."""
+        return object_tables(self.ram)
+
+    def _tile_grid(self, screen):
+        """
+        Return the playfield as a grid of block classes.
+
+        Args:
+            screen: the RGB screen to decode the playfield from
+
+        Returns:
+            a uint8 array of TILE_GRID_SHAPE with the dominant color class
+            (two bits per RGB channel) of each 16x16 playfield block
+
+        """
+        stride = BLOCK_SAMPLE_STRIDE
+        playfield = screen[PLAYFIELD_TOP::stride, ::stride] >> 6
+        red, green, blue = np.moveaxis(playfield, -1, 0)
+        classes = red << 4 | green << 2 | blue
+        rows, columns = TILE_GRID_SHAPE
+        samples = BLOCK_SIZE // stride
+        blocks = classes.reshape(rows, samples, columns, samples)
+        blocks = blocks.transpose(0, 2, 1, 3).reshape(rows * columns, -1)
+        # count the color classes of every block in a single histogram
+        counts = np.bincount(
+            (blocks + _BLOCK_HISTOGRAM_OFFSETS).ravel(),
+            minlength=64 * rows * columns,
+        )
+        grid = counts.reshape(rows * columns, 64).argmax(axis=1)
+        return grid.astype(np.uint8).reshape(TILE_GRID_SHAPE)
+
+    def _roi_window(self, screen):
+        """
+        Return the window of the playfield around Link.
+
+        Args:
+            screen: the RGB screen to take the window from
+
+        Returns:
+            a view of the screen with shape (*roi_shape, 3), centered on
+            Link's sprite and clamped to the playfield
+
+        """
+        height, width = self.roi_shape
+        center = BLOCK_SIZE // 2
+        top = int(self._y_pixel) + LINK_SPRITE_OFFSET + center - height // 2
+        top = min(max(top, PLAYFIELD_TOP), len(screen) - height)
+        left = int(self._x_pixel) + center - width // 2
+        left = min(max(left, 0), screen.shape[1] - width)
+        return screen[top:top + height, left:left + width]
+
+    def _get_observation(self, screen):
+        """Return the observation of the configured type from a screen."""
+        if self.obs_type == 'tiles':
+            return dict(
+                tiles=self._tile_grid(screen),
+                objects=self._object_table,
+            )
+        if self.obs_type == 'playfield':
+            return screen[PLAYFIELD_TOP:]
+        if self.obs_type == 'roi':
+            return self._roi_window(screen)
+        return screen
+
+    def _compact(self, observation):
+        """Return a compact copy of a screen view in low memory mode."""
+        if not self.low_memory:
+            return observation
+        if self.obs_type in ('playfield', 'roi'):
+            return observation.copy()
+        return observation
+
+    def _observe(self, screen):
+        """
+        Update the events and return the observation after a reset or step.
+
+        Args:
+            screen: the view of the screen that nes-py returned
+
+        Returns:
+            the observation of the configured type
+
+        """
+        self._update_events()
+        return self._compact(self._get_observation(screen))
 
     # MARK: nes-py API calls
 
+    def reset(self, *, seed=None, options=None):
+        """
+        Reset the environment and return the first observation and info.
+
+        Args:
+            seed: an optional seed for the environment's random generator
+            options: an optional dictionary of start state perturbations
+            drawn from the seeded random generator:
+            - noop_max: advance a random number of NOOP frames in [0, noop_max]
+            - randomize_rng: whether to randomize the game's RNG state
+
+        Returns:
+            a tuple of the first observation and info
+
+        """
+        options = dict(options or {})
+        if options.get('noop_max', 0) < 0:
+            raise ValueError('noop_max must be non-negative')
+        self._reset_options = options
+        self._clear_event_state()
+        self._task_complete = False
+        observation, info = super().reset(seed=seed, options=options)
+        observation = self._observe(observation)
+        info['events'] = self._events.copy()
+        info['frames'] = 0
+        return observation, info
+
+    def step(self, action):
+        """Step the environment and return the transition."""
+        observation, reward, terminated, truncated, info = super().step(action)
+        observation = self._observe(observation)
+        info['events'] = self._events.copy()
+        info['frames'] = self._step_frames
+        return observation, reward, terminated, truncated, info
+
+    def load_state(self, snapshot):
+        """
+        Restore the emulator from a snapshot of dump_state.
+
+        Args:
+            snapshot: the snapshot to restore
+
+        Returns:
+            None
+
+        """
+        super().load_state(snapshot)
+        # the events of the next step compare against the restored state
+        self._clear_event_state()
+        self._task_complete = False
+
+    def info_record(self):
+        """
+        Return the info of the current state as a structured record.
+
+        Returns:
+            an INFO_RECORD_DTYPE record of the raw RAM bytes of the info
+
+        """
+        return info_records(self.ram)
+
+    def episode_kwargs(self):
+        """
+        Return the keyword arguments that rebuild the episodes of this env.
+
+        Returns:
+            a JSON serializable dictionary of the task and its parameters
+            (empty without a task). the other keyword arguments only change
+            the observations, not the emulated states
+
+        """
+        if self.task is None:
+            return {}
+        return dict(task=self.task.name, task_params=self.task.params)
+
     def _will_reset(self):
         """Handle and RAM hacking before a reset occurs."""
         pass
 
     def _did_reset(self):
         """Handle any RAM hacking after a reset occurs."""
-        pass
+        # restore the task's start state and perturb it so that parallel
+        # environments with different seeds begin from decorrelated states
+        options = self._reset_options
+        if self._start_state is not None:
+            super().load_state(self._start_state)
+        if options.get('randomize_rng', False):
+            size = RNG_ADDRESSES.stop - RNG_ADDRESSES.start
+            self.ram[RNG_ADDRESSES] = self.np_random.integers(1, 256, size)
+        if options.get('noop_max', 0) > 0:
+            frames = self.np_random.integers(options['noop_max'] + 1)
+            for _ in range(frames):
+                self._frame_advance(0)
 
     def _did_step(self, done):
         """
@@ -426,27 +1000,46 @@ class Zelda1Env(NESEnv):
             None
 
         """
+        self._pre_skip_state = self.ram[_EVENT_ADDRESSES]
+        # deaths and continues are events on the step they start, not on
+        # every step that Link stays at zero health
+        dying = self._is_death_spiral or self._needs_death_recovery
+        self._death_started = dying and not self._dying
+        self._dying = dying
+        # the frame of the step plus the frames that the skipping advances
+        self._step_frames = 1
         if done:
             return
-        self._recover_from_zero_health()
-        self._wait_for_scroll()
-        self._skip_boring_actions()
-        self._skip_inventory_scroll()
+        frames = self._recover_from_zero_health()
+        self._continued = bool(frames) and not self._continuing
+        self._continuing = bool(frames)
+        frames += self._wait_for_scroll()
+        frames += self._skip_boring_actions()
+        frames += self._skip_inventory_scroll()
+        self._step_frames += frames
 
     def _get_reward(self):
         """Return the reward after a step occurs."""
-        return 0.0
+        if self.task is None:
+            return 0.0
+        # nes-py asks for the reward before the termination flag, so the task
+        # is checked once here and the result is reused by _get_terminated
+        self._task_complete = bool(self.task.success(
+            info_records(self.ram), object_tables(self.ram)))
+        return float(self._task_complete)
 
     def _get_terminated(self):
         """Return True if the episode is over, False otherwise."""
         # Zelda1-v0 deliberately treats death recovery as non-terminal. Callers
-        # that need fixed episode lengths should wrap the environment.
-        return False
+        # that need fixed episode lengths should wrap the environment. Task
+        # episodes end when the task is complete.
+        return self._task_complete
 
     def _get_info(self):
         """Return the info after a step occurs"""
         return dict(
             current_level=self._current_level,
+            room=self._current_room,
             x_pos=self._x_pixel,
             y_pos=self._y_pixel,
             direction=self._direction,
@@ -480,8 +1073,13 @@ class Zelda1Env(NESEnv):
             has_magic_boomerang=self._is_magic_boomerang_in_inventory,
             has_magic_shield=self._is_magic_shield_in_inventory,
             max_number_of_bombs=self._max_number_of_bombs,
+            objects=self._object_table,
         )
 
 
 # explicitly define the outward facing API of this module
-__all__ = [Zelda1Env.__name__]
+__all__ = [
+    Zelda1Env.__name__,
+    info_records.__name__,
+    object_tables.__name__,
+]